@@ -0,0 +1,364 @@
+import numpy as np
+import polars as pl
+
+# 연령표준화에 사용하는 5세 연령대 (85세 이상은 '85+'로 통합)
+STANDARD_AGE_GROUPS = [
+    "0-4", "5-9", "10-14", "15-19", "20-24", "25-29", "30-34", "35-39", "40-44",
+    "45-49", "50-54", "55-59", "60-64", "65-69", "70-74", "75-79", "80-84", "85+"
+]
+
+# 표준인구 (10만 명 기준). 한국 2000년 표준인구는 수집한 2000년 인구에서 산출합니다.
+STANDARD_POPULATIONS = {
+    "korea2000": None,
+    "who2000": [
+        8860, 8690, 8600, 8470, 8220, 7930, 7610, 7150, 6590,
+        6040, 5370, 4550, 3720, 2960, 2210, 1520, 910, 635
+    ],
+    "segi": [
+        12000, 10000, 9000, 9000, 8000, 8000, 6000, 6000, 6000,
+        6000, 5000, 4000, 4000, 3000, 2000, 1000, 500, 500
+    ],
+}
+
+STANDARD_LABELS = {
+    "korea2000": "한국 2000년 인구",
+    "who2000": "WHO 세계 표준인구 (2000-2025)",
+    "segi": "Segi 세계 표준인구",
+}
+
+
+def asr_column(standard):
+    return f"asr_{standard}"
+
+
+def asr_var_column(standard):
+    return f"asr_var_{standard}"
+
+
+# 발생률 95% 신뢰구간의 정규분위수
+CI_Z = 1.959964
+CI_COLUMNS = ["rate_lower", "rate_upper"]
+
+
+def poisson_limits(cases, z=CI_Z):
+    """관측 건수의 Poisson 신뢰한계 (Byar 근사, 0건이면 하한 0).
+
+    행별 정확 구간(카이제곱 분위수) 대신 닫힌 식으로 계산하므로 모든 행에 한 번의 polars 식으로 적용됩니다.
+    """
+    cases = cases.cast(pl.Float64)
+    lower = pl.when(cases > 0).then(
+        cases * (1 - 1 / (9 * cases) - z / (3 * cases.sqrt())) ** 3
+    ).otherwise(0.0)
+    upper = (cases + 1) * (1 - 1 / (9 * (cases + 1)) + z / (3 * (cases + 1).sqrt())) ** 3
+    return lower, upper
+
+
+def rate_ci(cases="cases", population="population", z=CI_Z):
+    """조발생률(10만 명당) 95% 신뢰구간 식 [rate_lower, rate_upper]."""
+    lower, upper = poisson_limits(pl.col(cases), z)
+    return [
+        (pl.when(pl.col(population) > 0)
+         .then(limit / pl.col(population) * 100000)
+         .otherwise(0.0))
+        .round(2).alias(name)
+        for limit, name in zip((lower, upper), CI_COLUMNS)
+    ]
+
+
+def asr_ci(standard, cases="cases", z=CI_Z):
+    """ASR 95% 신뢰구간 식 [rate_lower, rate_upper] (Dobson 방법).
+
+    총 발생자수 O의 Poisson 한계를 ASR 분산 비율로 옮깁니다: ASR + sqrt(Var(ASR) / O) · (O_L − O).
+    발생자수가 0이면 조발생률 구간(rate_lower/rate_upper)을 그대로 사용합니다.
+    """
+    observed = pl.col(cases).cast(pl.Float64)
+    scale = (pl.col(asr_var_column(standard)).clip(lower_bound=0) / observed).sqrt()
+    return [
+        pl.when(observed > 0)
+        .then((pl.col(asr_column(standard)) + scale * (limit - observed)).clip(lower_bound=0))
+        .otherwise(pl.col(name))
+        .round(2).alias(name)
+        for limit, name in zip(poisson_limits(observed, z), CI_COLUMNS)
+    ]
+
+
+def standard_weights(df_pop):
+    """표준인구별 연령대 가중치(합계 1)를 long 형식(standard, age_group, weight)으로 반환합니다."""
+    frames = []
+    for standard, counts in STANDARD_POPULATIONS.items():
+        if counts is None:
+            # 한국 2000년 표준인구: 2000년 남녀 합계 인구
+            frame = df_pop.filter(
+                (pl.col("year") == 2000) & pl.col("age_group").is_in(STANDARD_AGE_GROUPS)
+            ).group_by("age_group").agg(pl.col("population").sum().alias("weight"))
+        else:
+            frame = pl.DataFrame({"age_group": STANDARD_AGE_GROUPS, "weight": [float(c) for c in counts]})
+        frames.append(frame.select([
+            pl.lit(standard).alias("standard"),
+            pl.col("age_group"),
+            (pl.col("weight") / pl.col("weight").sum()).alias("weight")
+        ]))
+    return pl.concat(frames)
+
+
+def compute_asr_cube(age_seg_df, weights, keys=("year", "gender", "cancer_type")):
+    """연도 × 성별 × 암종별 연령표준화 발생률(10만 명당)과 그 분산을 한 번의 가중 집계로 계산합니다.
+
+    반환값은 (keys..., asr_<standard>..., asr_var_<standard>...) wide 테이블입니다.
+    분산 Σ wᵢ²·dᵢ/nᵢ²은 암종 간 합산·차감 시에도 더해지므로 선택 집계의 신뢰구간에 그대로 쓸 수 있습니다.
+    """
+    keys = list(keys)
+    cube = age_seg_df.join(weights, on="age_group", how="inner").group_by(
+        keys + ["standard"]
+    ).agg([
+        (pl.when(pl.col("population") > 0)
+         .then(pl.col("cases") / pl.col("population") * 100000)
+         .otherwise(0.0) * pl.col("weight")).sum().round(2).alias("asr"),
+        (pl.when(pl.col("population") > 0)
+         .then(pl.col("cases") / pl.col("population") ** 2 * 100000 ** 2)
+         .otherwise(0.0) * pl.col("weight") ** 2).sum().alias("asr_var"),
+    ])
+    # 다중 values pivot은 asr_<standard>, asr_var_<standard> 컬럼을 만듭니다.
+    return cube.pivot(values=["asr", "asr_var"], index=keys, on="standard")
+
+
+def crude_variance():
+    """단일 연령대 행의 발생률 분산 d/n² (10만 명당 단위). ASR 분산 컬럼의 연령대 행 값으로 사용합니다."""
+    return (pl.when(pl.col("population") > 0)
+            .then(pl.col("cases") / pl.col("population") ** 2 * 100000 ** 2)
+            .otherwise(0.0))
+
+
+# 발생률 테이블(스냅샷 processed, 예측) 스키마: 연령대별 행과 계(전체) 행이 같은 컬럼을 가집니다. (시도별은 앞에 region)
+# 발생률 95% 신뢰구간(rate_lower/rate_upper)과 ASR 분산(선택 집계의 ASR 신뢰구간 계산용)을 함께 저장합니다.
+PROCESSED_COLUMNS = ["year", "gender", "age_group", "cancer_type", "cases", "incidence_rate", "population"] + [
+    asr_column(standard) for standard in STANDARD_POPULATIONS
+] + CI_COLUMNS + [asr_var_column(standard) for standard in STANDARD_POPULATIONS]
+
+
+def build_incidence_table(age_seg_df, weights, region_keys=()):
+    """연령대별 행(cases, population, incidence_rate)에 계(전체) 행·ASR·신뢰구간을 더해 PROCESSED_COLUMNS 스키마로 만듭니다.
+
+    계(전체)는 발생자수·인구 합계로 조발생률을 다시 계산하고 ASR 큐브를 결합하며,
+    단일 연령대 행의 ASR은 조발생률(분산 포함)과 같습니다. 모든 행에 조발생률 Poisson 95% 신뢰구간을 붙입니다.
+    """
+    region_keys = list(region_keys)
+    cube_keys = ["year"] + region_keys + ["gender", "cancer_type"]
+    total_df = age_seg_df.group_by(cube_keys).agg([
+        pl.col("cases").sum().alias("cases"),
+        pl.col("population").sum().alias("population")
+    ]).with_columns([
+        pl.lit("계(전체)").alias("age_group"),
+        (pl.when(pl.col("population") > 0)
+         .then((pl.col("cases") / pl.col("population")) * 100000)
+         .otherwise(0.0))
+        .round(2).alias("incidence_rate")
+    ]).join(compute_asr_cube(age_seg_df, weights, keys=cube_keys), on=cube_keys, how="left")
+
+    asr_cols = [asr_column(standard) for standard in STANDARD_POPULATIONS]
+    asr_var_cols = [asr_var_column(standard) for standard in STANDARD_POPULATIONS]
+    age_seg_df = age_seg_df.with_columns(
+        [pl.col("incidence_rate").alias(c) for c in asr_cols] + [crude_variance().alias(c) for c in asr_var_cols]
+    )
+
+    final_cols = region_keys + PROCESSED_COLUMNS
+    return pl.concat([
+        age_seg_df.with_columns(rate_ci()).select(final_cols),
+        total_df.with_columns(rate_ci()).select(final_cols)
+    ]).sort(region_keys + ["year", "gender", "age_group", "cancer_type"])
+
+
+# 조인포인트 탐색 시 각 구간에 필요한 최소 관측 연도 수
+MIN_SEGMENT_YEARS = 4
+
+
+def _batched_wls(X, Y, W):
+    """여러 설계행렬(K개) × 여러 시계열(S개)의 가중 최소제곱을 한 번에 풉니다.
+
+    X: (K, T, p), Y/W: (S, T) → beta (K, S, p), sse (K, S)
+    """
+    p = X.shape[2]
+    xtwx = np.einsum("ktp,st,ktq->kspq", X, W, X) + np.eye(p) * 1e-9
+    xtwy = np.einsum("ktp,st,st->ksp", X, W, Y)
+    beta = np.linalg.solve(xtwx, xtwy[..., None])[..., 0]
+    resid = Y[None] - np.einsum("ktp,ksp->kst", X, beta)
+    sse = np.einsum("st,kst->ks", W, resid ** 2)
+    return beta, sse
+
+
+def _series_matrix(df, keys, value_col):
+    """long 형식 데이터를 (시계열 × 연도) 행렬로 변환합니다. 0 이하·누락 값은 가중치 0."""
+    wide = df.pivot(values=value_col, index=keys, on="year", aggregate_function="first")
+    year_cols = sorted((c for c in wide.columns if c not in keys), key=int)
+    years = np.array([int(c) for c in year_cols], dtype=float)
+    Y = wide.select(year_cols).to_numpy().astype(float)
+    W = (np.isfinite(Y) & (Y > 0)).astype(float)
+    logY = np.log(np.where(W > 0, Y, 1.0))
+    return wide.select(keys), years, Y, W, logY
+
+
+def _pct(slope):
+    return (np.exp(slope) - 1) * 100
+
+
+def compute_trend_stats(df, keys, rate_col="incidence_rate"):
+    """모든 시계열에 대해 로그선형 회귀로 APC/AAPC와 조인포인트(최대 1개)를 일괄 추정합니다.
+
+    시계열별 반복문 없이 (연도 × 시계열) 행렬 하나로 0-조인포인트 모형과 모든 후보 조인포인트
+    모형을 동시에 적합하고, BIC가 더 낮은 모형을 선택합니다. 0 이하이거나 누락된 발생률은 가중치 0으로 제외합니다.
+    """
+    series, years, Y, W, logY = _series_matrix(df, keys, rate_col)
+    t = years - years[0]
+    n = W.sum(axis=1)
+    ones = np.ones_like(t)
+
+    # 0-조인포인트: log(rate) = a + b·t
+    beta0, sse0 = _batched_wls(np.stack([ones, t], axis=1)[None], logY, W)
+    slope0, sse0 = beta0[0, :, 1], sse0[0]
+
+    # 1-조인포인트: log(rate) = a + b·t + c·max(t - τ, 0) (연속 구간 회귀), τ 후보 전체를 동시에 적합
+    candidates = t[MIN_SEGMENT_YEARS - 1:len(t) - MIN_SEGMENT_YEARS + 1]
+    if len(candidates) > 0:
+        X1 = np.stack([
+            np.stack([ones, t, np.maximum(t - tau, 0.0)], axis=1) for tau in candidates
+        ])
+        beta1, sse1 = _batched_wls(X1, logY, W)
+        best = np.argmin(sse1, axis=0)
+        idx = np.arange(len(best))
+        beta1, sse1, tau = beta1[best, idx], sse1[best, idx], candidates[best]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bic0 = n * np.log(np.maximum(sse0, 1e-12) / n) + 2 * np.log(n)
+            bic1 = n * np.log(np.maximum(sse1, 1e-12) / n) + 4 * np.log(n)
+        use_jp = (bic1 < bic0) & (n >= 2 * MIN_SEGMENT_YEARS)
+    else:
+        beta1 = np.zeros((len(n), 3))
+        tau = np.zeros(len(n))
+        use_jp = np.zeros(len(n), dtype=bool)
+
+    span = t[-1] if len(t) > 1 else 1.0
+    slope_before = np.where(use_jp, beta1[:, 1], slope0)
+    slope_after = np.where(use_jp, beta1[:, 1] + beta1[:, 2], slope0)
+    # AAPC: 구간 기울기를 구간 길이로 가중평균
+    aapc_slope = np.where(use_jp, (tau * slope_before + (span - tau) * slope_after) / span, slope0)
+    valid = n >= 3
+
+    stats = pl.DataFrame({
+        "apc": np.where(valid, _pct(slope0), np.nan),
+        "aapc": np.where(valid, _pct(aapc_slope), np.nan),
+        "apc_recent": np.where(valid, _pct(slope_after), np.nan),
+        "joinpoint_year": np.where(valid & use_jp, years[0] + tau, np.nan),
+        "n_years": n.astype(np.int32),
+    }).with_columns([
+        pl.col(c).fill_nan(None).round(2) for c in ["apc", "aapc", "apc_recent"]
+    ] + [pl.col("joinpoint_year").fill_nan(None).cast(pl.Int32)])
+    return pl.concat([series, stats], how="horizontal")
+
+
+# 예측에 사용할 최근 관측 연도 수
+FORECAST_FIT_YEARS = 10
+# 추세 감쇠 계수: h년 뒤 연간 기울기는 b·φ^h (Nordpred식 추세 약화로 장기 외삽 폭주 방지)
+FORECAST_DAMPING = 0.9
+
+
+def compute_forecast(data, df_pop, end_year, fit_years=FORECAST_FIT_YEARS, weights=None):
+    """연령별 발생률을 최근 추세로 외삽하고 추계인구를 곱해 end_year까지의 발생자수를 예측합니다.
+
+    모든 암종 × 성별 × 연령대 시계열을 한 번의 일괄 로그선형 회귀로 적합하고, 기울기는
+    FORECAST_DAMPING으로 연도마다 감쇠시킵니다. 관측치가 적은(대부분 0인) 시계열은 최근 평균 발생률을 유지합니다.
+    반환값은 data와 같은 스키마(연령대별 행 + 계(전체) 행, ASR 포함)입니다.
+    weights를 생략하면 df_pop에서 표준인구 가중치를 산출합니다.
+    """
+    keys = ["cancer_type", "gender", "age_group"]
+    age_df = data.filter(pl.col("age_group") != "계(전체)")
+    last_year = age_df["year"].max()
+    future = np.arange(last_year + 1, end_year + 1, dtype=float)
+    if len(future) == 0:
+        return data.head(0)
+
+    fit_df = age_df.filter(pl.col("year") > last_year - fit_years).with_columns(
+        (pl.when(pl.col("population") > 0)
+         .then(pl.col("cases") / pl.col("population") * 100000)
+         .otherwise(0.0)).alias("crude_rate")
+    )
+    series, years, Y, W, logY = _series_matrix(fit_df, keys, "crude_rate")
+    t = years - years[0]
+    beta, _ = _batched_wls(np.stack([np.ones_like(t), t], axis=1)[None], logY, W)
+    beta = beta[0]
+
+    # 마지막 관측 연도의 발생률에서 출발해 감쇠된 기울기를 누적합니다. (차트의 관측선과 예측선이 끊기지 않도록)
+    # 마지막 연도 관측치가 없거나 0이면 그 연도의 적합값에서 출발합니다.
+    h = future - last_year
+    damped = FORECAST_DAMPING * (1 - FORECAST_DAMPING ** h) / (1 - FORECAST_DAMPING)
+    fitted = beta[:, :1] + beta[:, 1:2] * (last_year - years[0])
+    observed = years[-1] == last_year
+    level = np.where(W[:, -1:] > 0, logY[:, -1:], fitted) if observed else fitted
+    trend = np.exp(level + beta[:, 1:2] * damped[None, :])
+    flat = np.nan_to_num(np.nanmean(Y, axis=1, keepdims=True)) * np.ones_like(trend)
+    rates = np.where((W.sum(axis=1) >= 5)[:, None], trend, flat)
+
+    forecast_rates = pl.concat([
+        series,
+        pl.DataFrame(rates, schema=[str(int(y)) for y in future], orient="row")
+    ], how="horizontal").unpivot(
+        index=keys, variable_name="year", value_name="rate"
+    ).with_columns(pl.col("year").cast(pl.Int32))
+
+    pop = df_pop.filter(pl.col("year") > last_year).with_columns(pl.col("year").cast(pl.Int32))
+    age_seg_df = forecast_rates.join(pop, on=["year", "gender", "age_group"], how="inner").with_columns(
+        (pl.col("rate") * pl.col("population") / 100000).alias("cases")
+    ).with_columns(
+        pl.col("rate").round(2).alias("incidence_rate")
+    )
+
+    return build_incidence_table(age_seg_df, weights if weights is not None else standard_weights(df_pop))
+
+
+# 출생 코호트 분석에 사용하는 연령대 (개방형 '85+'는 출생연도 범위가 정해지지 않아 제외)
+COHORT_AGE_GROUPS = STANDARD_AGE_GROUPS[:-1]
+COHORT_BAND_WIDTH = 5
+
+
+def compute_cohort_table(df, rate_col="incidence_rate", keys=("cancer_type", "gender")):
+    """연령 × 기간 발생률 행렬을 출생 코호트 대각선으로 재배열합니다. (모든 암종 × 성별 일괄)
+
+    a~a+4세의 t년 발생률은 대략 (t − a − 2)년 출생자의 값이므로, 출생연도 c 코호트는 j번째 연령대에서
+    t = c + 5j + 2년의 값을 갖습니다. (시계열 × 연령대 × 연도) 배열에 (코호트 × 연령대) 연도 인덱스를 한 번에
+    적용해 코호트별 반복문 없이 모든 대각선을 뽑습니다.
+    반환값: (keys..., cohort, age_group, year, rate) long 테이블 (관측이 없는 칸은 제외)
+    """
+    keys = list(keys)
+    age_df = df.filter(pl.col("age_group").is_in(COHORT_AGE_GROUPS)).select(keys + ["age_group", "year", rate_col])
+    if age_df.is_empty():
+        return pl.DataFrame(schema={
+            **{k: pl.String for k in keys}, "cohort": pl.Int32, "age_group": pl.String, "year": pl.Int32, "rate": pl.Float64
+        })
+
+    series = age_df.select(keys).unique().sort(keys)
+    first_year, last_year = age_df["year"].min(), age_df["year"].max()
+    n_ages, n_years = len(COHORT_AGE_GROUPS), last_year - first_year + 1
+    idx = age_df.join(series.with_row_index("s"), on=keys, how="left").select([
+        pl.col("s"),
+        pl.col("age_group").replace_strict(COHORT_AGE_GROUPS, range(n_ages), return_dtype=pl.Int64).alias("a"),
+        (pl.col("year") - first_year).alias("t"),
+        pl.col(rate_col).cast(pl.Float64),
+    ])
+    rates = np.full((len(series), n_ages, n_years), np.nan)
+    rates[idx["s"].to_numpy(), idx["a"].to_numpy(), idx["t"].to_numpy()] = idx[rate_col].to_numpy()
+
+    # 코호트 c의 j번째 연령대 관측 연도: c + 5j + 2 (관측 기간 밖은 제외)
+    offsets = COHORT_BAND_WIDTH * np.arange(n_ages) + COHORT_BAND_WIDTH // 2
+    cohorts = np.arange(first_year - offsets[-1], last_year - offsets[0] + 1)
+    t_idx = cohorts[:, None] + offsets[None, :] - first_year
+    inside = (t_idx >= 0) & (t_idx < n_years)
+    diagonals = rates[:, np.arange(n_ages)[None, :], np.clip(t_idx, 0, n_years - 1)]
+    s, c, a = np.nonzero(inside[None] & np.isfinite(diagonals))
+
+    return pl.concat([
+        series[s],
+        pl.DataFrame({
+            "cohort": cohorts[c].astype(np.int32),
+            "age_group": np.array(COHORT_AGE_GROUPS)[a],
+            "year": (t_idx[c, a] + first_year).astype(np.int32),
+            "rate": diagonals[s, c, a],
+        })
+    ], how="horizontal")
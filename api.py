@@ -0,0 +1,313 @@
+"""KOSIS 암발생 통계 HTTP API (헤드리스)
+
+Streamlit 앱이 게시한 스냅샷(세대)을 그대로 읽어 추이·순위·비중·원자료 조회 결과를 JSON 또는 Arrow IPC로 제공합니다.
+스냅샷이 없으면 앱과 같은 파이프라인(datasets.build_snapshot_tables)으로 만들어 게시합니다.
+
+    python api.py --port 8600
+    KOSIS_FIXTURE=fixture.json python api.py   # 오프라인 fixture로 로컬 실행 (synthetic.py로 생성)
+
+GET 엔드포인트 (공통 파라미터: region=시도, format=json|arrow):
+    /api/v1/meta
+    /api/v1/trends?cancer=위(C16)&cancer=대장(C18-C20)&exclude=...&age=계(전체)&standard=segi
+    /api/v1/rankings?year=2023&top=10&standard=segi
+    /api/v1/proportions?year=2023&gender=여자
+    /api/v1/data?year=2023&gender=남자&age=60-64&cancer=폐(C33-C34)
+
+응답에는 스냅샷 세대와 요청으로 만든 ETag가 붙으며, If-None-Match가 일치하면 데이터를 읽지 않고 304를 반환합니다.
+"""
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import io
+import json
+import os
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import polars as pl
+from dotenv import load_dotenv
+
+import datasets
+import snapshot
+from analytics import STANDARD_POPULATIONS, asr_column
+from datasets import NATIONAL_REGION
+from queries import build_proportion_table, build_ranking_table, apply_selection
+
+API_PREFIX = "/api/v1"
+# 응답 형식: format 파라미터 → Content-Type
+RESPONSE_FORMATS = {
+    "json": "application/json; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+RESPONSE_CACHE_SIZE = 256
+# 캐시된 응답도 매번 ETag로 재검증하도록 합니다. (새 세대가 게시되면 즉시 반영)
+CACHE_CONTROL = "no-cache"
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _values(params, key):
+    return [v for v in params.get(key, []) if v != ""]
+
+
+def _one(params, key, cast=str, default=None):
+    values = _values(params, key)
+    if not values:
+        return default
+    try:
+        return cast(values[-1])
+    except ValueError:
+        raise ApiError(400, f"{key}: 잘못된 값입니다 ({values[-1]})")
+
+
+def _standard(params):
+    standard = _one(params, "standard")
+    if standard is not None and standard not in STANDARD_POPULATIONS:
+        raise ApiError(400, f"standard: {', '.join(STANDARD_POPULATIONS)} 중 하나여야 합니다")
+    return standard
+
+
+@functools.lru_cache(maxsize=16)
+def load_frame(generation, region):
+    """세대·지역별 발생률 테이블 (전국은 mmap 스냅샷, 시도는 해당 파티션만)."""
+    if region == NATIONAL_REGION:
+        return snapshot.load_generation(generation)
+    if region not in snapshot.list_partition_values("region_processed", generation, "region"):
+        raise ApiError(404, f"region: 알 수 없는 지역입니다 ({region})")
+    return datasets.load_region_processed(generation, region)
+
+
+def default_cancer(frame):
+    """앱의 기본 선택과 같은 모든 암(C00-C96) 항목."""
+    cancer_types = frame["cancer_type"].unique().sort().to_list()
+    return next((ct for ct in cancer_types if "모든" in ct and "암" in ct and "C00-C96" in ct), cancer_types[0])
+
+
+def meta(generation, frame, params):
+    """조회 가능한 값 목록 (연도·성별·연령대·암종·지역·표준인구)."""
+    return {
+        "generation": generation,
+        "years": frame["year"].unique().sort().to_list(),
+        "genders": frame["gender"].unique().sort().to_list(),
+        "age_groups": frame["age_group"].unique().sort().to_list(),
+        "cancer_types": frame["cancer_type"].unique().sort().to_list(),
+        "regions": [NATIONAL_REGION] + snapshot.list_partition_values("region_processed", generation, "region"),
+        "standards": list(STANDARD_POPULATIONS),
+        "endpoints": [f"{API_PREFIX}/{name}" for name in ENDPOINTS],
+    }
+
+
+def trends(generation, frame, params):
+    """암종 선택(합산/제외)·연령대별 연도 추이. 앱의 추이 차트와 같은 apply_selection 결과입니다."""
+    cancers = _values(params, "cancer") or [default_cancer(frame)]
+    ages = _values(params, "age") or ["계(전체)"]
+    return apply_selection(frame, cancers, _values(params, "exclude"), ages, _standard(params))
+
+
+def rankings(generation, frame, params):
+    """연도·성별 Top N 암종 순위 (year 생략 시 전체 연도)."""
+    standard = _standard(params)
+    rank_data = frame.with_columns(pl.col(asr_column(standard)).alias("incidence_rate")) if standard else frame
+    ranking = build_ranking_table(rank_data, top_n=_one(params, "top", int, 10))
+    year = _one(params, "year", int)
+    return ranking if year is None else ranking.filter(pl.col("year") == year)
+
+
+def proportions(generation, frame, params):
+    """연령그룹별 암종 발생률과 그룹 내 비중 (year 생략 시 전체 연도)."""
+    year = _one(params, "year", int)
+    table = build_proportion_table(frame, years=None if year is None else [year])
+    gender = _one(params, "gender")
+    return table if gender is None else table.filter(pl.col("gender") == gender)
+
+
+def data(generation, frame, params):
+    """원자료 행 조회. year·gender·age·cancer는 여러 번 지정할 수 있습니다."""
+    filters = []
+    for key, column, cast in (("year", "year", int), ("gender", "gender", str), ("age", "age_group", str), ("cancer", "cancer_type", str)):
+        try:
+            values = [cast(v) for v in _values(params, key)]
+        except ValueError:
+            raise ApiError(400, f"{key}: 잘못된 값입니다")
+        if values:
+            filters.append(pl.col(column).is_in(values))
+    return frame.filter(*filters) if filters else frame
+
+
+ENDPOINTS = {
+    "meta": meta,
+    "trends": trends,
+    "rankings": rankings,
+    "proportions": proportions,
+    "data": data,
+}
+
+
+def canonical_query(params):
+    """파라미터 순서와 무관한 캐시·ETag 키 (format·region 포함)."""
+    return tuple(sorted((key, tuple(values)) for key, values in params.items()))
+
+
+def make_etag(generation, endpoint, query, encoding=None):
+    """데이터 세대 + 요청 + 전송 인코딩으로 만든 ETag. 데이터를 읽지 않고 계산되므로 재검증이 저렴합니다.
+
+    gzip 응답과 원본 응답은 다른 표현이므로 다른 (strong) ETag를 갖습니다.
+    """
+    digest = hashlib.sha1(repr((endpoint, query)).encode("utf-8")).hexdigest()[:16]
+    suffix = f"-{encoding}" if encoding else ""
+    return f'"g{generation}-{digest}{suffix}"'
+
+
+@functools.lru_cache(maxsize=RESPONSE_CACHE_SIZE)
+def render(generation, endpoint, query, fmt):
+    """응답 본문을 만들어 (원본, gzip) 쌍으로 캐싱합니다. 같은 세대·요청은 한 번만 계산·압축합니다."""
+    params = {key: list(values) for key, values in query}
+    frame = load_frame(generation, _one(params, "region", default=NATIONAL_REGION))
+    result = ENDPOINTS[endpoint](generation, frame, params)
+    if isinstance(result, dict):
+        if fmt != "json":
+            raise ApiError(400, "meta는 JSON으로만 제공됩니다")
+        body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+    elif fmt == "arrow":
+        sink = io.BytesIO()
+        result.write_ipc_stream(sink)
+        body = sink.getvalue()
+    else:
+        body = b'{"generation":%d,"rows":%d,"data":%s}' % (generation, len(result), result.write_json().encode("utf-8"))
+    return body, gzip.compress(body, compresslevel=6)
+
+
+def _error(status, message):
+    return status, {"Content-Type": RESPONSE_FORMATS["json"]}, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+def handle_request(path, query_string, headers, generation=None):
+    """요청 하나를 처리해 (상태 코드, 헤더, 본문)을 반환합니다. 소켓 없이 직접 호출해 테스트할 수 있습니다."""
+    generation = generation if generation is not None else snapshot.current_generation()
+    if generation is None:
+        return _error(503, "게시된 스냅샷이 없습니다")
+    endpoint = path[len(API_PREFIX) + 1:] if path.startswith(API_PREFIX + "/") else None
+    if endpoint not in ENDPOINTS:
+        return _error(404, f"알 수 없는 경로입니다: {path}")
+
+    params = parse_qs(query_string, keep_blank_values=False)
+    fmt = _one(params, "format", default="arrow" if "arrow" in headers.get("Accept", "") else "json")
+    if fmt not in RESPONSE_FORMATS:
+        return _error(400, f"format: {', '.join(RESPONSE_FORMATS)} 중 하나여야 합니다")
+    params["format"] = [fmt]
+    query = canonical_query(params)
+    # 클라이언트가 허용하면 항상 gzip으로 보내므로, 본문을 만들기 전에 인코딩과 ETag가 정해집니다.
+    encoding = "gz" if "gzip" in headers.get("Accept-Encoding", "") else None
+    etag = make_etag(generation, endpoint, query, encoding)
+    response_headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept, Accept-Encoding",
+        "X-Snapshot-Generation": str(generation),
+    }
+    if_none_match = headers.get("If-None-Match", "")
+    if if_none_match == "*" or etag in [t.strip() for t in if_none_match.split(",")]:
+        return 304, response_headers, b""
+
+    try:
+        body, compressed = render(generation, endpoint, query, fmt)
+    except ApiError as e:
+        return _error(e.status, str(e))
+    response_headers["Content-Type"] = RESPONSE_FORMATS[fmt]
+    if encoding:
+        response_headers["Content-Encoding"] = "gzip"
+        body = compressed
+    return 200, response_headers, body
+
+
+def ensure_snapshot():
+    """게시된 스냅샷이 없으면 앱과 같은 파이프라인으로 만들어 게시합니다. 반환값: 세대 번호 (실패 시 None)"""
+    generation = snapshot.current_generation()
+    if generation is not None:
+        return generation
+    if not snapshot.acquire_build_lock():
+        return snapshot.wait_for_generation(timeout=snapshot.LOCK_STALE_SECONDS)
+    try:
+        tables = asyncio.run(datasets.build_snapshot_tables(os.getenv("KOSIS_API_KEY")))
+        if tables is None or len(tables["processed"]) == 0:
+            return None
+        return datasets.publish_snapshot(tables)
+    finally:
+        snapshot.release_build_lock()
+
+
+def warm(generation):
+    """자주 쓰는 응답(메타, 전체 연도 순위·비중, 기본 추이)을 미리 만들어 캐시에 넣습니다."""
+    for endpoint in ("meta", "trends", "rankings", "proportions"):
+        for fmt in (("json",) if endpoint == "meta" else RESPONSE_FORMATS):
+            handle_request(f"{API_PREFIX}/{endpoint}", f"format={fmt}", {}, generation)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "CancerTrendAPI/1"
+    quiet = False
+
+    def _respond(self, include_body):
+        url = urlsplit(self.path)
+        try:
+            status, headers, body = handle_request(url.path, url.query, self.headers)
+        except Exception:
+            # 예상하지 못한 오류도 연결을 끊지 않고 500으로 응답합니다. (--quiet이어도 traceback은 출력)
+            traceback.print_exc()
+            status, headers, body = _error(500, "서버 내부 오류가 발생했습니다")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if include_body and status != 304:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(include_body=True)
+
+    def do_HEAD(self):
+        self._respond(include_body=False)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--fixture", help="오프라인 fixture JSON 경로 (KOSIS_FIXTURE와 같음)")
+    parser.add_argument("--quiet", action="store_true", help="요청 로그를 출력하지 않습니다")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.fixture:
+        os.environ[datasets.FIXTURE_SETTING] = os.path.abspath(args.fixture)
+    generation = ensure_snapshot()
+    if generation is None:
+        raise SystemExit("스냅샷을 만들지 못했습니다. KOSIS_API_KEY 또는 KOSIS_FIXTURE를 확인해주세요.")
+    warm(generation)
+
+    ApiHandler.quiet = args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"serving generation {generation} on http://{args.host}:{args.port}{API_PREFIX}/meta", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
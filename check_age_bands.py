@@ -0,0 +1,94 @@
+"""연령대 정제 회귀 점검 (이전 1999년 80+ 분할 ↔ harmonise_age_bands)
+
+연령대 정제를 harmonise_age_bands로 일반화하기 전의 인구 정제(85세 이상 세분 연령대 합산 + 1999년 80+를
+2000년 구성비로 분할)를 그대로 옮겨 두고, 같은 fixture의 전국·시도별 인구 테이블에서 두 결과가 행 단위로
+같은지 비교합니다. 다르면 차이 나는 행을 출력하고 종료 코드 1로 끝납니다.
+
+    python check_age_bands.py                    # synthetic.py 합성 fixture (17개 시도 포함)
+    python check_age_bands.py fixture.json       # KOSIS 형식 fixture (load_fixture 형식)
+"""
+import argparse
+import sys
+
+import polars as pl
+
+import datasets
+import synthetic
+
+# 값 비교 허용 오차 (인구 단위)
+TOLERANCE = 1e-6
+# 이전 normalize_age가 '85+'로 합산하던 세분 연령대
+LEGACY_85_PLUS = ["85-89", "90-94", "95-99", "100+"]
+
+
+def legacy_normalize_population(df_pop):
+    """harmonise_age_bands 도입 전의 인구 정제. 85세 이상 세분 연령대를 합산하고 1999년 80+는 2000년 구성비로 분할합니다."""
+    df_pop = df_pop.with_columns(
+        pl.when(pl.col("age_group").is_in(LEGACY_85_PLUS)).then(pl.lit("85+")).otherwise(pl.col("age_group")).alias("age_group")
+    )
+    group_keys = [k for k in ["region", "gender"] if k in df_pop.columns]
+
+    # 1999년 80+ 데이터 추산 로직
+    pop_2000 = df_pop.filter(pl.col("year") == 2000)
+    dist_2000 = pop_2000.filter(pl.col("age_group").is_in(["80-84", "85+"])).group_by(group_keys).agg([
+        pl.col("population").filter(pl.col("age_group") == "80-84").sum().alias("pop_80_84"),
+        pl.col("population").filter(pl.col("age_group") == "85+").sum().alias("pop_85_up"),
+        pl.col("population").sum().alias("total_80_plus")
+    ]).with_columns([
+        (pl.col("pop_80_84") / pl.col("total_80_plus")).alias("ratio_80_84"),
+        (pl.col("pop_85_up") / pl.col("total_80_plus")).alias("ratio_85_up")
+    ])
+
+    pop_1999_80_plus = df_pop.filter((pl.col("year") == 1999) & (pl.col("age_group") == "80+"))
+    if len(pop_1999_80_plus) > 0:
+        estimated_1999 = pop_1999_80_plus.join(dist_2000.select(group_keys + ["ratio_80_84", "ratio_85_up"]), on=group_keys)
+        estimated_80_84 = estimated_1999.with_columns([
+            pl.lit("80-84").alias("age_group"),
+            (pl.col("population") * pl.col("ratio_80_84")).alias("population")
+        ]).select(["year"] + group_keys + ["age_group", "population"])
+        estimated_85_up = estimated_1999.with_columns([
+            pl.lit("85+").alias("age_group"),
+            (pl.col("population") * pl.col("ratio_85_up")).alias("population")
+        ]).select(["year"] + group_keys + ["age_group", "population"])
+        df_pop = df_pop.filter(~((pl.col("year") == 1999) & (pl.col("age_group") == "80+")))
+        df_pop = pl.concat([df_pop, estimated_80_84, estimated_85_up])
+
+    return df_pop.group_by(["year"] + group_keys + ["age_group"]).agg(pl.col("population").sum())
+
+
+def compare(legacy, current, value_col="population", tolerance=TOLERANCE):
+    """두 정제 결과의 행 단위 차이 (한쪽에만 있는 행 포함)."""
+    keys = [c for c in legacy.columns if c != value_col]
+    return legacy.rename({value_col: "legacy"}).join(
+        current.rename({value_col: "current"}), on=keys, how="full", coalesce=True
+    ).filter(
+        pl.col("legacy").is_null() | pl.col("current").is_null() |
+        ((pl.col("legacy") - pl.col("current")).abs() > tolerance)
+    ).sort(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixture", nargs="?", help="KOSIS 형식 fixture JSON (생략 시 합성 fixture)")
+    parser.add_argument("--regions", type=int, default=17, help="합성 fixture의 시도 수")
+    args = parser.parse_args()
+
+    # 이전 정제는 1세별 연령을 합산하지 않으므로 5세 연령대 fixture로 비교합니다.
+    fixture = datasets.load_fixture(args.fixture) if args.fixture else synthetic.generate(regions=args.regions)
+    failed = False
+    for name in ["population", "region_population"]:
+        if name not in fixture:
+            continue
+        spec = {**datasets.DATASETS, **datasets.REGION_FIXTURE_DATASETS}[name]
+        mapped = datasets.map_columns(pl.DataFrame(fixture[name]), spec["columns"], spec["value"])
+        diff = compare(legacy_normalize_population(mapped), datasets.normalize_population(mapped))
+        split_rows = mapped.filter(pl.col("age_group") == "80+").height
+        print(f"{name}: {mapped.height}행, 80+ 분할 {split_rows}행, 불일치 {diff.height}행")
+        if not diff.is_empty():
+            print(diff)
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
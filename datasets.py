@@ -0,0 +1,465 @@
+import asyncio
+import hashlib
+import json
+import os
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+import httpx
+import polars as pl
+
+import snapshot
+import validation
+from analytics import PROCESSED_COLUMNS, build_incidence_table, standard_weights
+from queries import build_rate_matrix
+
+# KOSIS 통계자료 OpenAPI
+KOSIS_URL = "https://kosis.kr/openapi/Param/statisticsParameterData.do"
+
+# 관측 자료 기간과 추계인구(DT_1BPA001 중위 추계)를 이용한 발생자수 예측 종료 연도
+START_YEAR = 1999
+LAST_OBSERVED_YEAR = 2023
+FORECAST_END_YEAR = 2040
+
+# 모든 테이블의 요청이 공유하는 동시 요청 수 (하나의 연결 풀)
+MAX_CONCURRENT_REQUESTS = 8
+
+NATIONAL_REGION = "전국"
+
+
+def update_url_params(url, start_year, end_year, api_key):
+    """URL의 startPrdDe와 endPrdDe 파라미터를 안전하게 업데이트하고 apiKey를 삽입합니다."""
+    u = urlparse(url)
+    query = parse_qs(u.query)
+    query['startPrdDe'] = [str(start_year)]
+    query['endPrdDe'] = [str(end_year)]
+    query['apiKey'] = [api_key]
+    new_query = urlencode(query, doseq=True)
+    return urlunparse(u._replace(query=new_query))
+
+
+async def fetch_api_batch(client, url_template, start_year, end_year, step=5, api_key=None, semaphore=None):
+    """비동기적으로 API 데이터를 수집합니다. (step년 단위로 나누어 동시 요청)
+
+    반환값: (레코드 리스트, 실패한 구간 [(시작 연도, 종료 연도, 사유)])
+    실패한 구간이 있는 테이블은 일부 연도가 빠져 있으므로 호출 측에서 캐싱하지 않아야 합니다.
+    """
+    semaphore = semaphore or asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def get(s_y, e_y):
+        url = update_url_params(url_template, s_y, e_y, api_key)
+        try:
+            async with semaphore:
+                resp = await client.get(url, timeout=60.0)
+        except httpx.HTTPError as e:
+            return None, f"{type(e).__name__}: {e}"
+        if resp.status_code != 200:
+            return None, f"HTTP {resp.status_code}"
+        try:
+            data = resp.json()
+        except ValueError:
+            return None, "invalid JSON"
+        if not isinstance(data, list):
+            # KOSIS는 오류를 {"err": ..., "errMsg": ...} 형식으로 반환합니다.
+            detail = (data.get("errMsg") or data.get("err")) if isinstance(data, dict) else None
+            return None, str(detail or "unexpected response")
+        return data, None
+
+    chunks = [(year, min(year + step - 1, end_year)) for year in range(start_year, end_year + 1, step)]
+    results = await asyncio.gather(*(get(s_y, e_y) for s_y, e_y in chunks))
+
+    all_data, failed = [], []
+    for (s_y, e_y), (data, error) in zip(chunks, results):
+        if error is None:
+            all_data.extend(data)
+        else:
+            failed.append((s_y, e_y, error))
+    return all_data, failed
+
+
+def normalize_age(age_str):
+    """연령대 명칭을 정규화합니다. (예: '85세 이상' → '85+', '0 - 4세' → '0-4')"""
+    if not age_str: return ""
+    # Standardize separator and remove noise
+    return age_str.replace("세", "").replace(" ", "").replace("이상", "+").replace("~", "-")
+
+
+def normalize_region(col):
+    """시도 명칭을 약칭으로 통일합니다. (예: '서울특별시' → '서울', '충청북도' → '충북', '전북특별자치도' → '전북')"""
+    return (
+        pl.when(col.str.starts_with("충청") | col.str.starts_with("전라") | col.str.starts_with("경상"))
+        .then(col.str.slice(0, 1) + col.str.slice(2, 1))
+        .otherwise(col.str.slice(0, 2))
+    )
+
+
+def map_columns(df_raw, columns, value_col):
+    """원자료를 (year, [region], gender, age_group, [cancer_type], value_col)로 매핑합니다. 시도별 자료의 전국 합계 행은 제외합니다."""
+    keys = [k for k in ["region", "gender", "age_group", "cancer_type"] if k in columns]
+    exprs = {
+        "region": lambda c: normalize_region(pl.col(c)),
+        "age_group": lambda c: pl.col(c).map_elements(normalize_age, return_dtype=pl.String),
+    }
+    df = df_raw.select(
+        [pl.col("PRD_DE").cast(pl.Int32).alias("year")] +
+        [exprs.get(k, pl.col)(columns[k]).alias(k) for k in keys] +
+        [pl.col("DT").cast(pl.Float64).alias(value_col)]
+    )
+    # 시도별 자료에 포함된 전국 합계 행은 제외합니다. (전국은 별도 테이블)
+    return df.filter(pl.col("region") != NATIONAL_REGION) if "region" in keys else df
+
+
+# 연령대 정의 (표준 연령대 STANDARD_AGE_GROUPS 기준)
+# 통합: 표준보다 세분화된 연령대 → 표준 연령대 (합산). 1세별 연령(예: '67세' → '67')도 해당 5세 연령대로 합산합니다.
+SINGLE_YEAR_AGE_MERGES = {
+    str(age): "85+" if age >= 85 else f"{age - age % 5}-{age - age % 5 + 4}" for age in range(100)
+}
+AGE_BAND_MERGES = {"85-89": "85+", "90-94": "85+", "95-99": "85+", "100+": "85+", **SINGLE_YEAR_AGE_MERGES}
+# 분할: 표준보다 넓은 개방형 연령대 → 구성 표준 연령대 (구성 연령대가 모두 관측된 다른 연도의 구성비로 배분)
+AGE_BAND_SPLITS = {"80+": ["80-84", "85+"]}
+# 구성비 기준: "nearest"(가장 가까운 관측 연도, 동률이면 이후 연도) 또는 "interpolate"(앞뒤 관측 연도 사이 선형 보간)
+AGE_BAND_SPLIT_METHOD = "nearest"
+# 정제 로직 버전: 정제 함수·정제 단계 검증의 동작을 바꾸면 올려서 캐시된 정제 결과(.snapshot/tables)를 무효화합니다.
+# (연령대 통합·분할 표와 구성비 기준은 테이블 캐시 키에 직접 포함됩니다.)
+NORMALIZER_VERSION = 2
+
+
+def _reference_shares(coarse, shares, keys, method):
+    """분할할 (연도, 키, 개방형 연령대)마다 구성 연령대별 구성비를 정합니다."""
+    part_keys = ["year"] + keys + ["band", "age_group"]
+    candidates = coarse.select(["year"] + keys + ["band"]).join(
+        shares.rename({"year": "ref_year"}), on=keys + ["band"], how="inner"
+    )
+    if method == "interpolate":
+        # 앞뒤 관측 연도의 구성비를 선형 보간하고, 한쪽만 있으면 그 값을 사용합니다.
+        before = candidates.filter(pl.col("ref_year") < pl.col("year")).group_by(part_keys).agg(
+            pl.all().sort_by("ref_year").last()
+        ).rename({"ref_year": "year_before", "share": "share_before"})
+        after = candidates.filter(pl.col("ref_year") > pl.col("year")).group_by(part_keys).agg(
+            pl.all().sort_by("ref_year").first()
+        ).rename({"ref_year": "year_after", "share": "share_after"})
+        weight = (pl.col("year") - pl.col("year_before")) / (pl.col("year_after") - pl.col("year_before"))
+        return before.join(after, on=part_keys, how="full", coalesce=True).select(part_keys + [
+            pl.coalesce(
+                pl.col("share_before") + (pl.col("share_after") - pl.col("share_before")) * weight,
+                pl.col("share_before"),
+                pl.col("share_after")
+            ).alias("share")
+        ])
+    # nearest: 연도 차이가 가장 작은 관측 연도 (동률이면 이후 연도)
+    return candidates.with_columns(
+        (pl.col("ref_year") - pl.col("year")).abs().alias("distance")
+    ).filter(
+        pl.struct(pl.col("distance"), -pl.col("ref_year")).rank("min").over(part_keys) == 1
+    ).select(part_keys + ["share"])
+
+
+def harmonise_age_bands(df, value_col, merges=AGE_BAND_MERGES, splits=AGE_BAND_SPLITS, method=AGE_BAND_SPLIT_METHOD):
+    """연도마다 다른 연령대 구분을 표준 연령대로 맞춥니다.
+
+    세분화된 연령대는 합산하고, 개방형 연령대(예: 1999년 '80+')는 같은 키(성별·시도·암종)에서
+    구성 연령대가 모두 관측된 연도의 구성비로 나눕니다. 연령대 구성은 자료에서 (연도, 키)별로 판별하므로
+    어느 연도에 어떤 구분이 쓰였는지 따로 지정할 필요가 없으며, 모든 연도·키를 조인 몇 번으로 한꺼번에 처리합니다.
+    기준 구성비가 없는 개방형 연령대 행은 나누지 않고 남겨 검증 단계에서 드러나게 합니다.
+    """
+    keys = [c for c in df.columns if c not in ("year", "age_group", value_col)]
+    row_keys = ["year"] + keys + ["age_group"]
+    df = df.with_columns(pl.col("age_group").replace(merges)).group_by(row_keys).agg(pl.col(value_col).sum())
+    if not splits:
+        return df
+
+    parts = pl.DataFrame({
+        "band": [band for band, components in splits.items() for _ in components],
+        "age_group": [component for components in splits.values() for component in components],
+    }).with_columns(pl.len().over("band").alias("n_parts"))
+
+    # 구성 연령대가 모두 관측된 (연도, 키)의 구성비
+    shares = df.join(parts, on="age_group", how="inner").filter(
+        pl.len().over(["year"] + keys + ["band"]) == pl.col("n_parts")
+    ).with_columns(
+        (pl.col(value_col) / pl.col(value_col).sum().over(["year"] + keys + ["band"])).alias("share")
+    ).select(["year"] + keys + ["band", "age_group", "share"])
+
+    coarse = df.filter(pl.col("age_group").is_in(list(splits))).rename({"age_group": "band"})
+    split = coarse.join(_reference_shares(coarse, shares, keys, method), on=["year"] + keys + ["band"], how="inner")
+    if split.is_empty():
+        return df
+
+    done = split.select(["year"] + keys + [pl.col("band").alias("age_group")]).unique()
+    return pl.concat([
+        df.join(done, on=row_keys, how="anti"),
+        split.select(row_keys + [(pl.col(value_col) * pl.col("share")).alias(value_col)]),
+    ]).group_by(row_keys).agg(pl.col(value_col).sum())
+
+
+def normalize_population(df_pop):
+    """매핑된 인구 자료를 표준 연령대로 맞춥니다. (1999년 80+는 가장 가까운 2000년 구성비로 분할)"""
+    return harmonise_age_bands(df_pop, "population")
+
+
+def normalize_cancer(df_cancer):
+    """매핑된 암발생 자료에서 완전히 같은 중복 행을 제거하고 표준 연령대로 맞춥니다."""
+    return harmonise_age_bands(df_cancer.unique(), "cases")
+
+
+def build_incidence(df_pop, df_cancer, weights):
+    """정제된 인구·암발생 데이터를 조인해 연령별/전체 발생률과 ASR을 계산합니다."""
+    region_keys = ["region"] if "region" in df_cancer.columns else []
+
+    # 조인
+    joined = df_cancer.join(df_pop, on=["year"] + region_keys + ["gender", "age_group"], how="left")
+    
+    # 1. 연령별 데이터 계산
+    # API의 DT는 암발생자수(cases)로 간주하며, 발생률은 (발생자수 / 인구수) * 100,000으로 수동 계산합니다.
+    age_seg_df = joined.filter(pl.col("population").is_not_null()).with_columns(
+        (pl.when(pl.col("population") > 0)
+         .then((pl.col("cases") / pl.col("population")) * 100000)
+         .otherwise(0.0))
+        .round(2).alias("incidence_rate")
+    )
+    
+    # 2. 전체 연령(Total) 행, ASR 큐브, 신뢰구간 (예측 테이블과 같은 스키마)
+    return build_incidence_table(age_seg_df, weights, region_keys)
+
+
+# 데이터셋 레지스트리
+# 원천 테이블마다 KOSIS 파라미터(params), 수집 기간과 요청 단위(step),
+# 원자료 컬럼 매핑(columns)과 값 컬럼명(value), 정제 함수(normalizer), 저장 파티션(partition_by)을 선언합니다.
+# 새 테이블은 여기에 항목을 추가하면 스케줄러가 기존 테이블과 함께 동시에 수집하고 개별 캐싱합니다.
+DATASETS = {
+    "population": {
+        "params": {
+            "orgId": "101", "tblId": "DT_1BPA001", "itmId": ["T10"],
+            "objL1": ["1"],
+            "objL2": ["1", "2"],
+            "objL3": [
+                "040", "050", "070", "100", "120", "130", "150", "160", "180", "190", "210",
+                "230", "260", "280", "310", "330", "340", "360", "380", "410", "430", "440"
+            ],
+        },
+        "years": (START_YEAR, FORECAST_END_YEAR),
+        "step": 5,
+        "columns": {"gender": "C2_NM", "age_group": "C3_NM"},
+        "value": "population",
+        "normalizer": normalize_population,
+    },
+    "cancer": {
+        "params": {
+            "orgId": "117", "tblId": "DT_117N_A0024", "itmId": ["16117ac000101"],
+            "objL1": "ALL",
+            "objL2": ["11101SSB21", "11101SSB22"],
+            "objL3": [f"15117AC0011{i:02d}" for i in range(2, 21)],
+        },
+        "years": (START_YEAR, LAST_OBSERVED_YEAR),
+        "step": 5,
+        "columns": {"cancer_type": "C1_NM", "gender": "C2_NM", "age_group": "C3_NM"},
+        "value": "cases",
+        "normalizer": normalize_cancer,
+    },
+}
+
+# 시도별 원천 테이블 — fixture 전용 (실제 KOSIS 시도별 통계표 연결은 후속 작업)
+# 시도별 인구·암발생 통계표(tblId, objL 코드)와 컬럼 구성을 아직 확인하지 못해 KOSIS에서는 수집하지 않습니다.
+# 여기의 컬럼 매핑은 시도/연도 파티션 저장과 지역별 조회 경로를 점검하기 위한 가정된 형식이며,
+# fixture(synthetic.py --regions)를 지정했을 때만 읽습니다. 통계표를 확정하면 params를 선언해 DATASETS로 옮기고
+# 실제 응답으로 매핑을 검증해야 합니다.
+REGION_FIXTURE_DATASETS = {
+    "region_population": {
+        "years": (START_YEAR, FORECAST_END_YEAR),
+        "step": 1,
+        "columns": {"region": "C1_NM", "gender": "C2_NM", "age_group": "C3_NM"},
+        "value": "population",
+        "normalizer": normalize_population,
+        "partition_by": ["region", "year"],
+    },
+    "region_cancer": {
+        "years": (START_YEAR, LAST_OBSERVED_YEAR),
+        "step": 1,
+        "columns": {"region": "C1_NM", "cancer_type": "C2_NM", "gender": "C3_NM", "age_group": "C4_NM"},
+        "value": "cases",
+        "normalizer": normalize_cancer,
+        "partition_by": ["region", "year"],
+    },
+}
+
+# 원천 테이블로부터 만드는 파생 테이블 (입력이 모두 있을 때만 생성)
+DERIVED_TABLES = {
+    "processed": {"inputs": ("population", "cancer"), "build": build_incidence},
+    "region_processed": {"inputs": ("region_population", "region_cancer"), "build": build_incidence, "partition_by": ["region", "year"]},
+}
+
+
+# 오프라인 fixture: KOSIS 응답 형식의 레코드를 테이블 이름별로 담은 JSON 경로 (설정 시 API를 호출하지 않음)
+# api_samples.json과 같은 api1(인구)/api2(암발생) 키도 허용합니다.
+FIXTURE_SETTING = "KOSIS_FIXTURE"
+FIXTURE_ALIASES = {"api1": "population", "api2": "cancer"}
+
+
+def load_fixture(path):
+    """fixture JSON을 {테이블 이름: 레코드 리스트}로 읽습니다."""
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    return {FIXTURE_ALIASES.get(key, key): rows for key, rows in records.items()}
+
+
+def build_kosis_url(params):
+    """레지스트리 파라미터로 KOSIS 요청 URL 템플릿을 만듭니다. (기간과 apiKey는 요청 시 삽입)"""
+    query = {"method": "getList"}
+    for key, value in params.items():
+        # KOSIS는 코드 목록을 '+'(공백)로 구분하며 끝에도 구분자를 붙입니다.
+        query[key] = value if isinstance(value, str) else "".join(f"{v} " for v in value)
+    for level in range(1, 9):
+        query.setdefault(f"objL{level}", "")
+    query.update({"format": "json", "jsonVD": "Y", "prdSe": "Y"})
+    return f"{KOSIS_URL}?{urlencode(query)}"
+
+
+def table_fingerprint(name, url):
+    """테이블 캐시 키: 요청 URL·기간·컬럼 매핑과 정제 방식(정제 함수, 연령대 통합·분할 표, 정제 로직 버전)이 같으면 같은 값."""
+    spec = DATASETS[name]
+    normalizer = [
+        spec["normalizer"].__name__, AGE_BAND_MERGES, AGE_BAND_SPLITS, AGE_BAND_SPLIT_METHOD, NORMALIZER_VERSION
+    ]
+    key = json.dumps([url, spec["years"], spec["columns"], normalizer], sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+async def fetch_tables(requests, api_key, max_concurrency=MAX_CONCURRENT_REQUESTS):
+    """여러 테이블의 연도 구간 요청을 하나의 클라이언트(공유 연결 풀)에서 동시에 수행합니다.
+
+    requests: {이름: (URL 템플릿, 시작 연도, 종료 연도, step)} → {이름: (원자료 리스트, 실패한 구간)}
+    """
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async with httpx.AsyncClient(limits=limits) as client:
+        results = await asyncio.gather(*(
+            fetch_api_batch(client, url, start, end, step, api_key=api_key, semaphore=semaphore)
+            for url, start, end, step in requests.values()
+        ))
+    return dict(zip(requests.keys(), results))
+
+
+async def load_tables(api_key, names=None, get_setting=os.getenv, refresh=False):
+    """레지스트리의 원천 테이블을 정제된 DataFrame으로 반환합니다. 반환값: ({이름: DataFrame}, [검증 리포트])
+
+    테이블별로 정제 결과(와 정제 단계 검증 리포트)를 캐싱하므로 새 테이블을 추가해도 기존 테이블은 다시 수집하지 않습니다.
+    refresh=True이면 캐시를 무시하고 모두 다시 수집합니다. 수집에 실패한 테이블은 제외됩니다.
+    fixture 모드에서는 fixture 전용 시도별 테이블(REGION_FIXTURE_DATASETS)도 읽습니다.
+    """
+    tables, reports, requests, fingerprints = {}, [], {}, {}
+    fixture_path = get_setting(FIXTURE_SETTING)
+    fixture = load_fixture(fixture_path) if fixture_path else None
+    registry = DATASETS if fixture is None else {**DATASETS, **REGION_FIXTURE_DATASETS}
+    for name in names or registry:
+        spec = registry[name]
+        if fixture is not None:
+            # fixture 모드: fixture에 있는 테이블만, 캐시 없이 매번 읽습니다.
+            if name in fixture:
+                requests[name] = (None, *spec["years"], spec["step"])
+            continue
+        url = build_kosis_url(spec["params"])
+        fingerprints[name] = table_fingerprint(name, url)
+        cached = None if refresh else snapshot.load_table_cache(name, fingerprints[name])
+        report = None if refresh else snapshot.load_table_cache(f"{name}_checks", fingerprints[name])
+        if cached is not None and report is not None:
+            tables[name] = cached
+            reports.append(report)
+        else:
+            requests[name] = (url, *spec["years"], spec["step"])
+
+    if fixture is not None:
+        fetched = {
+            name: ([r for r in fixture[name] if start <= int(r["PRD_DE"]) <= end], [])
+            for name, (_, start, end, _) in requests.items()
+        }
+    else:
+        fetched = await fetch_tables(requests, api_key) if requests else {}
+    for name, (raw, failed) in fetched.items():
+        if failed:
+            reports.append(validation.check_fetch(name, failed))
+        if not raw:
+            continue
+        spec = registry[name]
+        mapped = map_columns(pl.DataFrame(raw), spec["columns"], spec["value"])
+        tables[name] = spec["normalizer"](mapped)
+        report = validation.check_source(
+            name, mapped, tables[name], spec["value"], deduplicate=spec["normalizer"] is normalize_cancer
+        )
+        reports.append(report)
+        # 일부 구간이 실패한 테이블은 캐싱하지 않아 다음 빌드에서 다시 수집합니다.
+        if name in fingerprints and not failed:
+            snapshot.save_table_cache(name, fingerprints[name], tables[name])
+            snapshot.save_table_cache(f"{name}_checks", fingerprints[name], report)
+    return tables, reports
+
+
+def build_derived_tables(tables):
+    """원천 테이블로부터 파생 테이블을 만듭니다. 표준인구 가중치는 전국 인구 기준을 공통으로 사용합니다."""
+    if "population" not in tables:
+        return {}
+    weights = standard_weights(tables["population"])
+    return {
+        name: spec["build"](*(tables[i] for i in spec["inputs"]), weights)
+        for name, spec in DERIVED_TABLES.items()
+        if all(i in tables for i in spec["inputs"])
+    }
+
+
+def validate_derived_tables(tables, derived):
+    """파생 테이블의 조인 누락과 연령대 합계를 검증합니다."""
+    return [
+        validation.check_incidence(name, *(tables[i] for i in DERIVED_TABLES[name]["inputs"]), frame)
+        for name, frame in derived.items() if name in DERIVED_TABLES
+    ]
+
+
+def partition_columns(name):
+    """테이블의 저장 파티션 컬럼 (없으면 None)."""
+    spec = DATASETS.get(name) or REGION_FIXTURE_DATASETS.get(name) or DERIVED_TABLES.get(name) or {}
+    return spec.get("partition_by")
+
+
+async def build_snapshot_tables(api_key, get_setting=os.getenv, refresh=False):
+    """레지스트리의 모든 테이블을 하나의 스케줄러로 동시에 수집하고 스냅샷에 게시할 테이블을 만듭니다.
+
+    반환값: {"processed": ..., "validation": ..., "rate_matrix": ..., "population": ..., [시도별 테이블]}
+    (처리 데이터가 없으면 None)
+    """
+    tables, reports = await load_tables(api_key, get_setting=get_setting, refresh=refresh)
+    derived = build_derived_tables(tables)
+    if "processed" not in derived:
+        return None
+
+    # 정제·조인 단계 검증 리포트는 스냅샷 세대와 함께 게시합니다.
+    reports += validate_derived_tables(tables, derived)
+    derived["validation"] = pl.concat(reports)
+
+    # 순위표와 같은 행의 연도별 발생률 행렬은 수집 시 한 번 만들어 스냅샷과 함께 게시합니다.
+    derived["rate_matrix"] = build_rate_matrix(derived["processed"])
+
+    # 추계인구(관측 이후 연도 포함)는 예측 단계에서 사용하도록 함께 반환합니다.
+    derived["population"] = tables["population"]
+    if "region_processed" in derived:
+        derived["region_population"] = tables["region_population"]
+    return derived
+
+
+def publish_snapshot(tables):
+    """build_snapshot_tables 결과를 새 세대로 게시하고 세대 번호를 반환합니다.
+
+    레지스트리에 파티션이 선언된 테이블(시도별)은 파티션 데이터셋으로 저장해 선택한 지역만 읽도록 합니다.
+    """
+    tables = dict(tables)
+    partitioned = {
+        name: (tables.pop(name), partition_columns(name))
+        for name in list(tables) if partition_columns(name)
+    }
+    return snapshot.publish(tables.pop("processed"), artifacts=tables, partitioned=partitioned)
+
+
+def load_region_processed(generation, region):
+    """선택한 시도의 발생률 파티션만 읽습니다. (전국 데이터와 같은 스키마)"""
+    return snapshot.scan_partitioned("region_processed", generation).filter(
+        pl.col("region") == region
+    ).with_columns(pl.col("year").cast(pl.Int32)).select(PROCESSED_COLUMNS).sort(
+        ["year", "gender", "age_group", "cancer_type"]
+    ).collect()
@@ -0,0 +1,48 @@
+import io
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 다운로드 포맷: 표시명 -> (확장자, MIME)
+EXPORT_FORMATS = {
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+    "CSV": ("csv", "text/csv"),
+}
+
+CHUNK_ROWS = 50_000
+
+
+def _arrow_chunks(df):
+    for chunk in df.iter_slices(CHUNK_ROWS):
+        yield chunk.to_arrow(compat_level=pl.CompatLevel.oldest())
+
+
+def write_export(df, fmt, sink):
+    """DataFrame을 CHUNK_ROWS 단위로 나누어 sink에 순차 기록합니다. (pandas 변환 없음)"""
+    if fmt == "CSV":
+        for i, chunk in enumerate(df.iter_slices(CHUNK_ROWS)):
+            chunk.write_csv(sink, include_header=(i == 0))
+        if df.is_empty():
+            df.write_csv(sink)
+        return
+
+    schema = df.head(0).to_arrow(compat_level=pl.CompatLevel.oldest()).schema
+    if fmt == "Parquet":
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for table in _arrow_chunks(df):
+                writer.write_table(table)
+    elif fmt == "Arrow IPC":
+        with pa.ipc.new_file(sink, schema) as writer:
+            for table in _arrow_chunks(df):
+                writer.write_table(table)
+    else:
+        raise ValueError(f"지원하지 않는 포맷입니다: {fmt}")
+
+
+def export_bytes(df, fmt):
+    """내보내기 결과를 bytes로 반환합니다. 클릭 시점에만 호출되도록 callable로 감싸 사용합니다."""
+    sink = io.BytesIO()
+    write_export(df, fmt, sink)
+    return sink.getvalue()
@@ -0,0 +1,290 @@
+"""동시 세션 부하 테스트 (streamlit run 서버 하나, 오프라인 fixture)
+
+`streamlit run main.py` 서버 프로세스 하나를 띄우고, N개의 세션이 브라우저 대신 웹소켓(/_stcore/stream)으로 동시에
+접속해 필터 변경·연도 슬라이더 이동·Bar Chart Race 전환 등 상호작용 시나리오를 수행합니다. 모든 세션이 같은 서버
+프로세스(Runtime, cache_resource/cache_data, 스냅샷 mmap)를 공유하므로, N별 rerun 지연시간(p50/p95/p99)·처리량과
+서버 프로세스 RSS(최대치)는 프로세스 하나가 동시 세션 N개를 얼마나 감당하는지를 보여줍니다.
+세션 클라이언트는 별도 프로세스에서 실행되며 RSS에 포함되지 않습니다.
+
+    python loadtest.py --sessions 1 4 8 16 --rounds 2
+    python loadtest.py --fixture fixture.json   # synthetic.py로 만든 fixture 또는 api_samples.json 형식
+"""
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+RUN_TIMEOUT = 300
+SERVER_START_TIMEOUT = 60
+RSS_SAMPLE_INTERVAL = 0.1
+
+
+def _widget(elements, label):
+    return next(e for e in elements if e.label == label)
+
+
+def widget_state(widget, value):
+    """브라우저가 보내는 것과 같은 WidgetState. 선택형 위젯의 값은 화면에 표시되는 옵션 문자열입니다."""
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    state = WidgetState(id=widget.id)
+    if widget.type in ("multiselect", "select_slider"):
+        state.string_array_value.data[:] = value if isinstance(value, list) else [value]
+    elif widget.type in ("radio", "selectbox"):
+        state.string_value = value
+    elif widget.type in ("toggle", "checkbox"):
+        state.bool_value = value
+    else:
+        raise ValueError(f"지원하지 않는 위젯: {widget.type}")
+    return state
+
+
+class ServerSession:
+    """streamlit run 서버에 웹소켓으로 접속한 세션 하나 (브라우저 역할).
+
+    rerun마다 받은 ForwardMsg를 AppTest와 같은 요소 트리(tree)로 파싱해 위젯을 찾고,
+    브라우저처럼 지금까지 바꾼 위젯 값을 모두 담아 다음 rerun을 요청합니다.
+    """
+
+    def __init__(self, websocket):
+        self._ws = websocket
+        self._states = {}
+        self.tree = None
+
+    def set(self, widget, value):
+        self._states[widget.id] = widget_state(widget, value)
+
+    def run(self):
+        """rerun을 요청하고 스크립트 실행이 끝날 때까지의 지연시간(초)을 반환합니다."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.testing.v1.element_tree import parse_tree_from_messages
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self._states.values())
+        start = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        messages = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self._ws.recv(timeout=RUN_TIMEOUT))
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                # st.rerun() 등으로 스크립트가 다시 시작되면 마지막 실행의 요소만 남깁니다.
+                messages = []
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+            messages.append(forward)
+        latency = time.perf_counter() - start
+        self.tree = parse_tree_from_messages(messages)
+        return latency
+
+
+def interaction_script(rng):
+    """세션 하나의 상호작용 시나리오: (단계 이름, 조작 함수(session, tree)) 목록. rng로 선택 값을 세션마다 달리합니다."""
+    def exclude(session, tree):
+        ms = _widget(tree.multiselect, "제외할 암종 선택 (발생률 차감)")
+        session.set(ms, rng.sample(ms.options, 2))
+
+    def ages(session, tree):
+        ms = _widget(tree.multiselect, "Age Groups")
+        session.set(ms, ["계(전체)"] + rng.sample(ms.options[1:], 2))
+
+    def cancers(session, tree):
+        ms = _widget(tree.multiselect, "Cancer Type(s)")
+        session.set(ms, rng.sample([c for c in ms.options if "모든" not in c], 3))
+
+    def asr(session, tree):
+        session.set(tree.radio(key="rate_mode"), "연령표준화 발생률 (ASR)")
+
+    def server_years(session, tree):
+        session.set(tree.toggle(key="client_year_switch"), False)
+
+    def scrub(key):
+        def step(session, tree):
+            slider = tree.select_slider(key=key)
+            session.set(slider, rng.choice(slider.options))
+        return step
+
+    def race(session, tree):
+        session.set(_widget(tree.radio, "보기 모드 선택"), "애니메이션 분석 (Bar Chart Race)")
+
+    return (
+        [("exclude", exclude), ("ages", ages), ("cancers", cancers), ("asr", asr), ("server_years", server_years)]
+        + [("ranking_scrub", scrub("ranking_year_slider"))] * 4
+        + [("prop_scrub", scrub("prop_year_slider"))] * 3
+        + [("race", race)]
+    )
+
+
+def run_session(session_id, rounds, url):
+    """세션 하나의 시나리오를 rounds번 실행합니다. (라운드마다 새 접속) 반환값: ([(단계, 지연시간)], [오류])"""
+    from websockets.sync.client import connect
+
+    rng = random.Random(session_id)
+    latencies, errors = [], []
+    for _ in range(rounds):
+        steps = [("initial", lambda session, tree: None)] + interaction_script(rng)
+        name = "connect"
+        try:
+            with connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=RUN_TIMEOUT) as websocket:
+                session = ServerSession(websocket)
+                for name, action in steps:
+                    action(session, session.tree)
+                    latencies.append((name, session.run()))
+                    if session.tree.exception:
+                        errors.append(f"session {session_id} {name}: {session.tree.exception[0].value}")
+                        break
+        except Exception as e:
+            errors.append(f"session {session_id} {name}: {e!r}")
+    return latencies, errors
+
+
+def rss_mb(pid):
+    """프로세스 RSS (Linux /proc). 읽을 수 없으면 NaN."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return float("nan")
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env, log):
+    """streamlit run 서버를 띄우고 health 엔드포인트가 응답할 때까지 기다립니다."""
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", APP_PATH,
+            "--server.port", str(port), "--server.address", "127.0.0.1", "--server.headless", "true",
+            "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+        ],
+        env=env, cwd=os.path.dirname(APP_PATH), stdout=log, stderr=subprocess.STDOUT
+    )
+
+    def log_tail():
+        # 로그는 임시 디렉터리와 함께 지워지므로 마지막 부분을 오류 메시지에 담습니다.
+        log.flush()
+        with open(log.name, encoding="utf-8", errors="replace") as f:
+            return f.read()[-2000:]
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"streamlit 서버가 종료되었습니다 (코드 {server.returncode}).\n{log_tail()}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    sys.exit(f"streamlit 서버가 {SERVER_START_TIMEOUT}초 안에 시작되지 않았습니다.\n{log_tail()}")
+
+
+def run_level(n_sessions, rounds, url, server_pid):
+    # 세션 클라이언트(프로토콜 파싱)는 별도 프로세스에서 실행해 측정 대상인 서버 프로세스와 GIL을 나누지 않게 합니다.
+    rss_peak = [rss_mb(server_pid)]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            rss_peak[0] = max(rss_peak[0], rss_mb(server_pid))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=n_sessions) as pool:
+            results = list(pool.map(run_session, range(n_sessions), [rounds] * n_sessions, [url] * n_sessions))
+    finally:
+        wall = time.perf_counter() - start
+        done.set()
+        sampler.join()
+    latencies = [item for session_latencies, _ in results for item in session_latencies]
+    errors = [error for _, session_errors in results for error in session_errors]
+    times = [t for _, t in latencies]
+    return {
+        "sessions": n_sessions,
+        "reruns": len(times),
+        "p50": percentile(times, 50) if times else float("nan"),
+        "p95": percentile(times, 95) if times else float("nan"),
+        "p99": percentile(times, 99) if times else float("nan"),
+        "throughput": len(times) / wall,
+        "rss_mb": rss_peak[0],
+        "errors": errors,
+        "by_step": {
+            name: statistics.median([t for n, t in latencies if n == name])
+            for name in dict.fromkeys(n for n, _ in latencies)
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rounds", type=int, default=1, help="세션당 시나리오 반복 횟수")
+    parser.add_argument("--fixture", help="fixture JSON 경로 (생략 시 synthetic.py로 생성)")
+    args = parser.parse_args()
+
+    # 스냅샷·fixture·서버 로그는 임시 디렉터리에 두어 작업 디렉터리의 .snapshot을 건드리지 않고, 끝나면 지웁니다.
+    with tempfile.TemporaryDirectory(prefix="cancertrend-loadtest-") as workdir:
+        fixture = os.path.abspath(args.fixture) if args.fixture else os.path.join(workdir, "fixture.json")
+        if not args.fixture:
+            import synthetic
+            synthetic.write_fixture(fixture)
+        env = {**os.environ, "CANCERTREND_SNAPSHOT_DIR": os.path.join(workdir, "snapshot"), "KOSIS_FIXTURE": fixture}
+        env.pop("KOSIS_API_KEY", None)
+
+        port = free_port()
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        with open(os.path.join(workdir, "server.log"), "w") as log:
+            server = start_server(port, env, log)
+            try:
+                # 스냅샷 빌드·캐시 준비 (측정 제외)
+                print(f"fixture: {fixture}\nserver: pid {server.pid}, port {port}\nwarming up...", flush=True)
+                _, warmup_errors = run_session(-1, 1, url)
+                if warmup_errors:
+                    sys.exit("warm-up failed: " + warmup_errors[0])
+                print(f"server RSS after warm-up: {rss_mb(server.pid):.1f} MB\n")
+
+                print(f"{'N':>4} {'reruns':>7} {'p50(s)':>8} {'p95(s)':>8} {'p99(s)':>8} {'rerun/s':>8} {'RSS(MB)':>8}")
+                for n in args.sessions:
+                    result = run_level(n, args.rounds, url, server.pid)
+                    print(
+                        f"{n:>4} {result['reruns']:>7} {result['p50']:>8.3f} {result['p95']:>8.3f} {result['p99']:>8.3f} "
+                        f"{result['throughput']:>8.2f} {result['rss_mb']:>8.1f}",
+                        flush=True
+                    )
+                    for error in result["errors"][:5]:
+                        print(f"     ! {error}")
+                print("(RSS: 서버 프로세스 하나의 최대 RSS)")
+                print("\nmedian latency by step (last level):")
+                for name, t in result["by_step"].items():
+                    print(f"  {name:<14} {t:.3f}s")
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,27 @@
 import polars as pl
-import httpx
 import asyncio
 import json
 import os
 import streamlit as st
+from streamlit.errors import StreamlitSecretNotFoundError
 from pyecharts import options as opts
-from pyecharts.charts import Line, Bar, Grid, Timeline
-from streamlit_echarts import st_pyecharts
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from pyecharts.charts import Line, Bar, Grid, Timeline, HeatMap
+from pyecharts.commons.utils import JsCode
+from streamlit_echarts import st_pyecharts, st_echarts
 from dotenv import load_dotenv
+import snapshot
+import datasets
+import validation
+from datasets import FORECAST_END_YEAR, NATIONAL_REGION, PROCESSED_COLUMNS
+from export import EXPORT_FORMATS, export_bytes
+from analytics import (
+    STANDARD_LABELS, CI_COLUMNS, COHORT_AGE_GROUPS, COHORT_BAND_WIDTH, asr_column, standard_weights,
+    compute_trend_stats, compute_forecast, compute_cohort_table
+)
+from queries import (
+    CUSTOM_AGE_ORDER, build_proportion_table, build_ranking_table, apply_selection, apply_comparison,
+    build_rate_matrix, rate_matrix_changes, rate_matrix_years
+)
 
 # Define stable colors for cancer types
 CANCER_COLORS = {
@@ -40,8 +53,16 @@ st.set_page_config(
 # 환경 변수 로드 (로컬용)
 load_dotenv()
 
+def get_setting(key):
+    """Streamlit Secrets 우선, 없으면 환경 변수 (secrets.toml이 없어도 환경 변수로 실행)"""
+    try:
+        value = st.secrets.get(key)
+    except StreamlitSecretNotFoundError:
+        value = None
+    return value or os.getenv(key)
+
 # API 키 가져오기 (Streamlit Secrets 우선, 없으면 환경 변수)
-API_KEY = st.secrets.get("KOSIS_API_KEY") or os.getenv("KOSIS_API_KEY")
+API_KEY = get_setting("KOSIS_API_KEY")
 
 # Custom CSS for Value Horizon Look & Feel
 st.markdown("""
@@ -96,156 +117,585 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def update_url_params(url, start_year, end_year):
-    """URL의 startPrdDe와 endPrdDe 파라미터를 안전하게 업데이트하고 apiKey를 삽입합니다."""
-    u = urlparse(url)
-    query = parse_qs(u.query)
-    query['startPrdDe'] = [str(start_year)]
-    query['endPrdDe'] = [str(end_year)]
-    query['apiKey'] = [API_KEY]
-    new_query = urlencode(query, doseq=True)
-    return urlunparse(u._replace(query=new_query))
-
-async def fetch_api_batch(client, url_template, start_year, end_year):
-    """비동기적으로 API 데이터를 수집합니다."""
-    tasks = []
-    for year in range(start_year, end_year + 1, 5):
-        s_y = year
-        e_y = min(year + 4, end_year)
-        url = update_url_params(url_template, s_y, e_y)
-        tasks.append(client.get(url, timeout=60.0))
-    
-    responses = await asyncio.gather(*tasks)
-    
-    all_data = []
-    for i, resp in enumerate(responses):
-        if resp.status_code == 200:
-            try:
-                data = resp.json()
-                if isinstance(data, list):
-                    all_data.extend(data)
-            except Exception as e:
-                pass
-    return all_data
-
-def normalize_age(age_str):
-    """연령대 명칭을 정규화합니다. 85세 이상 세분화 항목을 '85+'로 통합합니다."""
-    if not age_str: return ""
-    # Standardize separator and remove noise
-    cleaned = age_str.replace("세", "").replace(" ", "").replace("이상", "+").replace("~", "-")
-    if cleaned in ["85-89", "90-94", "95-99", "100+"]:
-        return "85+"
-    return cleaned
-
-@st.cache_data(show_spinner="Fetching data from API...")
+# 세대별 캐시는 디스크에 남는 세대 수(KEEP_GENERATIONS)만큼만 유지합니다. 오래된 세대의 memory map을 붙잡고 있으면
+# publish()가 지운 파일이 디스크에서 해제되지 않고, 새로고침할 때마다 워커 메모리가 늘어납니다.
+# (세대, 지역)별 캐시는 세대당 최근 지역 MAX_CACHED_REGIONS개까지 유지합니다.
+MAX_CACHED_REGIONS = 16
+REGION_CACHE_ENTRIES = snapshot.KEEP_GENERATIONS * MAX_CACHED_REGIONS
+
+@st.cache_resource(show_spinner=False, max_entries=snapshot.KEEP_GENERATIONS)
+def _load_snapshot(generation):
+    """세대별 스냅샷을 프로세스당 한 번만 memory-map 합니다. (rerun마다 복사본을 만들지 않음)"""
+    return snapshot.load_generation(generation)
+
+def build_snapshot(refresh=False):
+    """데이터 수집 및 정제 후 새 세대의 스냅샷을 게시합니다. 다른 워커가 빌드 중이면 그 결과를 기다립니다."""
+    if not snapshot.acquire_build_lock():
+        with st.spinner("다른 프로세스가 데이터를 준비하고 있습니다..."):
+            return snapshot.wait_for_generation(
+                timeout=snapshot.LOCK_STALE_SECONDS, after=snapshot.current_generation()
+            )
+    try:
+        with st.spinner("Fetching data from API..."):
+            tables = asyncio.run(_get_processed_data_async(refresh=refresh))
+        if tables is None or len(tables["processed"]) == 0:
+            return None
+        return datasets.publish_snapshot(tables)
+    finally:
+        snapshot.release_build_lock()
+
+def rebuild_snapshot(refresh=False):
+    """새 세대를 게시하고 rerun 합니다.
+
+    새 세대가 게시되지 않으면(수집 실패, 다른 프로세스의 빌드 대기 시간 초과) 같은 세대로 빌드를 반복하지 않도록
+    오류를 표시하고 멈춥니다.
+    """
+    previous = snapshot.current_generation()
+    generation = build_snapshot(refresh=refresh)
+    if generation is None or generation == previous:
+        st.error("📡 **새 스냅샷을 만들지 못했습니다.**")
+        st.warning("API 키가 유효한지 또는 KOSIS 서버가 정상인지 확인한 뒤 다시 시도해주세요.")
+        st.stop()
+    st.rerun()
+
 def get_processed_data_v2():
-    """데이터 수집 및 정제 과정을 수행하고 캐싱합니다. (v2: 인구수 데이터 포함)"""
-    return asyncio.run(_get_processed_data_async())
-
-def map_to_custom_age_group(age):
-    """정규화된 연령대를 요청된 5개 그룹으로 매핑합니다."""
-    if age in ["0-4", "5-9", "10-14", "15-19"]:
-        return "0-19세"
-    elif age in ["20-24", "25-29", "30-34", "35-39"]:
-        return "20-39세"
-    elif age in ["40-44", "45-49"]:
-        return "40-49세"
-    elif age in ["50-54", "55-59"]:
-        return "50-59세"
-    elif age in ["60-64", "65-69", "70-74", "75-79", "80-84", "85+"]:
-        return "60세+"
-    return None
-
-async def _get_processed_data_async():
-    url_pop = f"https://kosis.kr/openapi/Param/statisticsParameterData.do?method=getList&apiKey={API_KEY}&itmId=T10+&objL1=1+&objL2=1+2+&objL3=040+050+070+100+120+130+150+160+180+190+210+230+260+280+310+330+340+360+380+410+430+440+&objL4=&objL5=&objL6=&objL7=&objL8=&format=json&jsonVD=Y&prdSe=Y&startPrdDe=1999&endPrdDe=2023&orgId=101&tblId=DT_1BPA001"
-    url_cancer = f"https://kosis.kr/openapi/Param/statisticsParameterData.do?method=getList&apiKey={API_KEY}&itmId=16117ac000101+&objL1=ALL&objL2=11101SSB21+11101SSB22+&objL3=15117AC001102+15117AC001103+15117AC001104+15117AC001105+15117AC001106+15117AC001107+15117AC001108+15117AC001109+15117AC001110+15117AC001111+15117AC001112+15117AC001113+15117AC001114+15117AC001115+15117AC001116+15117AC001117+15117AC001118+15117AC001119+15117AC001120+&objL4=&objL5=&objL6=&objL7=&objL8=&format=json&jsonVD=Y&prdSe=Y&startPrdDe=1999&endPrdDe=2023&orgId=117&tblId=DT_117N_A0024"
-
-    async with httpx.AsyncClient() as client:
-        pop_raw = await fetch_api_batch(client, url_pop, 1999, 2023)
-        cancer_raw = await fetch_api_batch(client, url_cancer, 1999, 2023)
-
-    if not pop_raw or not cancer_raw:
+    """공유 Arrow 스냅샷에서 정제된 데이터를 반환합니다. (v2: 인구수 데이터 포함)
+
+    모든 워커가 같은 파일을 읽기 전용으로 mmap 하므로 워커를 추가해도 노드당 메모리가 일정하고,
+    새 워커는 이미 게시된 스냅샷을 즉시 사용합니다.
+    """
+    generation = snapshot.current_generation()
+    if generation is None:
+        generation = build_snapshot()
+        if generation is None:
+            return None
+    return _load_snapshot(generation)
+
+@st.cache_resource(show_spinner=False, max_entries=REGION_CACHE_ENTRIES)
+def get_region_data(generation, region):
+    """선택한 시도의 파티션만 읽습니다. (전국 데이터와 같은 스키마)"""
+    return datasets.load_region_processed(generation, region)
+
+def get_region_population(generation, region):
+    """선택한 시도의 인구(추계 포함) 파티션만 읽습니다."""
+    frame = snapshot.scan_partitioned("region_population", generation)
+    if frame is None:
         return None
+    return frame.filter(pl.col("region") == region).with_columns(
+        pl.col("year").cast(pl.Int32)
+    ).select(["year", "gender", "age_group", "population"]).collect()
 
-    df_pop = pl.DataFrame(pop_raw)
-    df_cancer = pl.DataFrame(cancer_raw)
-
-    # 인구 데이터 정제
-    df_pop = df_pop.with_columns([
-        pl.col("PRD_DE").cast(pl.Int32).alias("year"),
-        pl.col("C2_NM").alias("gender"),
-        pl.col("C3_NM").map_elements(normalize_age, return_dtype=pl.String).alias("age_group"),
-        pl.col("DT").cast(pl.Float64).alias("population")
-    ]).select(["year", "gender", "age_group", "population"])
-
-    # 1999년 80+ 데이터 추산 로직
-    pop_2000 = df_pop.filter(pl.col("year") == 2000)
-    dist_2000 = pop_2000.filter(pl.col("age_group").is_in(["80-84", "85+"])).group_by(["gender"]).agg([
-        pl.col("population").filter(pl.col("age_group") == "80-84").sum().alias("pop_80_84"),
-        pl.col("population").filter(pl.col("age_group") == "85+").sum().alias("pop_85_up"),
-        pl.col("population").sum().alias("total_80_plus")
-    ]).with_columns([
-        (pl.col("pop_80_84") / pl.col("total_80_plus")).alias("ratio_80_84"),
-        (pl.col("pop_85_up") / pl.col("total_80_plus")).alias("ratio_85_up")
-    ])
+def proportion_series(gender_df):
+    """연령그룹별 Top 5 암종과 기타(Others)로 누적 막대 시리즈를 구성합니다.
 
-    pop_1999_80_plus = df_pop.filter((pl.col("year") == 1999) & (pl.col("age_group") == "80+"))
-    if len(pop_1999_80_plus) > 0:
-        estimated_1999 = pop_1999_80_plus.join(dist_2000.select(["gender", "ratio_80_84", "ratio_85_up"]), on="gender")
-        estimated_80_84 = estimated_1999.with_columns([
-            pl.lit("80-84").alias("age_group"),
-            (pl.col("population") * pl.col("ratio_80_84")).alias("population")
-        ]).select(["year", "gender", "age_group", "population"])
-        estimated_85_up = estimated_1999.with_columns([
-            pl.lit("85+").alias("age_group"),
-            (pl.col("population") * pl.col("ratio_85_up")).alias("population")
-        ]).select(["year", "gender", "age_group", "population"])
-        df_pop = df_pop.filter(~((pl.col("year") == 1999) & (pl.col("age_group") == "80+")))
-        df_pop = pl.concat([df_pop, estimated_80_84, estimated_85_up])
-
-    df_pop = df_pop.group_by(["year", "gender", "age_group"]).agg(pl.col("population").sum())
-
-    # 암 데이터 정제
-    df_cancer = df_cancer.with_columns([
-        pl.col("PRD_DE").cast(pl.Int32).alias("year"),
-        pl.col("C2_NM").alias("gender"),
-        pl.col("C3_NM").map_elements(normalize_age, return_dtype=pl.String).alias("age_group"),
-        pl.col("C1_NM").alias("cancer_type"),
-        pl.col("DT").cast(pl.Float64).alias("cases")
-    ]).select(["year", "gender", "age_group", "cancer_type", "cases"])
-    df_cancer = df_cancer.unique()
-
-    # 조인
-    joined = df_cancer.join(df_pop, on=["year", "gender", "age_group"], how="left")
-    
-    # 1. 연령별 데이터 계산
-    # API의 DT는 암발생자수(cases)로 간주하며, 발생률은 (발생자수 / 인구수) * 100,000으로 수동 계산합니다.
-    age_seg_df = joined.filter(pl.col("population").is_not_null()).with_columns(
-        (pl.when(pl.col("population") > 0)
-         .then((pl.col("cases") / pl.col("population")) * 100000)
-         .otherwise(0.0))
-        .round(2).alias("incidence_rate")
+    반환값: (아래에서 위로 쌓을 암종 목록, {암종: 연령그룹별 비중}) — 기타(Others)는 항상 마지막에 쌓습니다.
+    """
+    # 1. Identify Top 5 per age group
+    age_top5_map = {}
+    all_top_cancers_union = set()
+
+    for age in CUSTOM_AGE_ORDER:
+        age_subset = gender_df.filter(pl.col("custom_age_group") == age)
+        if age_subset.is_empty():
+            age_top5_map[age] = []
+            continue
+
+        # Get top 5 cancers for THIS age group
+        top5 = (
+            age_subset.sort("proportion", descending=True)
+            .head(5)["cancer_type"].to_list()
+        )
+        age_top5_map[age] = top5
+        for c in top5:
+            all_top_cancers_union.add(c)
+
+    # Sort the union set by the MAX proportion it achieves in any age group
+    # This helps ensure that the 'most dominant' cancer in any group is likely to be at the bottom
+    cancer_ranks = []
+    for c in all_top_cancers_union:
+        max_prop = gender_df.filter(pl.col("cancer_type") == c)["proportion"].max()
+        cancer_ranks.append({"name": c, "max_prop": max_prop or 0})
+
+    union_list = [item["name"] for item in sorted(cancer_ranks, key=lambda x: x["max_prop"], reverse=True)]
+
+    # 2. Prepare data for each series
+    series_data = {c: [0.0] * len(CUSTOM_AGE_ORDER) for c in union_list}
+    series_data["기타(Others)"] = [0.0] * len(CUSTOM_AGE_ORDER)
+
+    for idx, age in enumerate(CUSTOM_AGE_ORDER):
+        age_subset = gender_df.filter(pl.col("custom_age_group") == age)
+        top5_for_this_age = age_top5_map.get(age, [])
+
+        # Proportions for Top 5
+        age_top5_data = age_subset.filter(pl.col("cancer_type").is_in(top5_for_this_age))
+        age_top5_dict = dict(zip(age_top5_data["cancer_type"].to_list(), age_top5_data["proportion"].to_list()))
+
+        # Update series_data for Top 5
+        for c in top5_for_this_age:
+            series_data[c][idx] = float(age_top5_dict.get(c, 0))
+
+        # Proportions for Others (all cancers NOT in Top 5 for this specific bar)
+        age_others_data = age_subset.filter(~pl.col("cancer_type").is_in(top5_for_this_age))
+        series_data["기타(Others)"][idx] = round(float(age_others_data["proportion"].sum()), 1)
+
+    return union_list, series_data
+
+@st.cache_resource(show_spinner="Fitting trend statistics...", max_entries=REGION_CACHE_ENTRIES * (1 + len(STANDARD_LABELS)))
+def get_trend_stats(generation, rate_col, region=NATIONAL_REGION):
+    """전체 암종 × 성별 × 연령대 시계열의 APC/AAPC 테이블. 전국은 스냅샷 세대와 함께 저장되어 워커 간에 공유됩니다."""
+    if region != NATIONAL_REGION:
+        return compute_trend_stats(get_region_data(generation, region), ["cancer_type", "gender", "age_group"], rate_col)
+    return snapshot.load_or_build_artifact(
+        f"trend_stats_{rate_col}",
+        generation,
+        lambda: compute_trend_stats(_load_snapshot(generation), ["cancer_type", "gender", "age_group"], rate_col)
     )
-    
-    # 2. 전체 연령(Total) 합계 및 발생률 재계산
-    total_df = joined.filter(pl.col("population").is_not_null()).group_by(["year", "gender", "cancer_type"]).agg([
-        pl.col("cases").sum().alias("cases"),
-        pl.col("population").sum().alias("population")
-    ]).with_columns([
-        pl.lit("계(전체)").alias("age_group"),
-        (pl.when(pl.col("population") > 0)
-         .then((pl.col("cases") / pl.col("population")) * 100000)
-         .otherwise(0.0))
-        .round(2).alias("incidence_rate")
+
+@st.cache_resource(show_spinner="Projecting incidence...", max_entries=REGION_CACHE_ENTRIES)
+def get_forecast(generation, region=NATIONAL_REGION):
+    """추계인구 기반 발생 예측(관측 이후 ~ FORECAST_END_YEAR). 스냅샷에 인구 추계가 없으면 None."""
+    if region != NATIONAL_REGION:
+        region_pop = get_region_population(generation, region)
+        national_pop = snapshot.load_artifact("population", generation)
+        if region_pop is None or national_pop is None:
+            return None
+        return compute_forecast(
+            get_region_data(generation, region), region_pop, FORECAST_END_YEAR,
+            weights=standard_weights(national_pop)
+        )
+    df_pop = snapshot.load_artifact("population", generation)
+    if df_pop is None:
+        return None
+    return snapshot.load_or_build_artifact(
+        "forecast",
+        generation,
+        lambda: compute_forecast(_load_snapshot(generation), df_pop, FORECAST_END_YEAR)
+    )
+
+@st.cache_resource(show_spinner="Building birth cohorts...", max_entries=REGION_CACHE_ENTRIES)
+def get_cohort_table(generation, region=NATIONAL_REGION):
+    """전체 암종 × 성별의 출생 코호트 대각선 테이블. 전국은 스냅샷 세대와 함께 저장되어 워커 간에 공유됩니다."""
+    if region != NATIONAL_REGION:
+        return compute_cohort_table(get_region_data(generation, region))
+    return snapshot.load_or_build_artifact(
+        "cohort", generation, lambda: compute_cohort_table(_load_snapshot(generation))
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def get_cohort_curves(generation, region, cancer_type, gender):
+    """암종·성별 하나의 코호트 곡선 {출생연도: 연령대 순서의 발생률}. 5년 간격 코호트 중 2개 연령대 이상 관측된 것만."""
+    curves = get_cohort_table(generation, region).filter(
+        (pl.col("cancer_type") == cancer_type) & (pl.col("gender") == gender)
+        & (pl.col("cohort") % COHORT_BAND_WIDTH == 0)
+    ).pivot(values="rate", index="cohort", on="age_group", aggregate_function="first").sort("cohort")
+    ages = [age for age in COHORT_AGE_GROUPS if age in curves.columns]
+    return {
+        row[0]: [row[1 + ages.index(age)] if age in ages else None for age in COHORT_AGE_GROUPS]
+        for row in curves.select(["cohort"] + ages).iter_rows()
+        if sum(v is not None for v in row[1:]) >= 2
+    }
+
+@st.cache_resource(show_spinner=False, max_entries=REGION_CACHE_ENTRIES)
+def get_rate_matrix(generation, region=NATIONAL_REGION):
+    """(측정값, 성별, 암종) × 연도 발생률 행렬. 전국은 수집 시 스냅샷 세대와 함께 게시된 행렬을 읽습니다."""
+    if region != NATIONAL_REGION:
+        return build_rate_matrix(get_region_data(generation, region))
+    return snapshot.load_or_build_artifact(
+        "rate_matrix", generation, lambda: build_rate_matrix(_load_snapshot(generation))
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=snapshot.KEEP_GENERATIONS)
+def get_validation_report(generation):
+    """수집 시 생성된 데이터 검증 리포트. 이전 세대 스냅샷에는 없으므로 None."""
+    return snapshot.load_artifact("validation", generation)
+
+def render_validation_report(generation):
+    """사이드바에 검증 결과 요약과 불일치 상세(연도·성별·연령대별)를 표시합니다."""
+    report = get_validation_report(generation)
+    if report is None:
+        return
+    label = "🧪 데이터 검증: 통과" if report.is_empty() else f"⚠️ 데이터 검증: {report['rows'].sum()}건 확인 필요"
+    with st.sidebar.expander(label, expanded=False):
+        if report.is_empty():
+            st.caption("중복, 합계, 연령대 구성, 인구 조인 검사를 모두 통과했습니다.")
+            return
+        st.dataframe(validation.summarize(report), hide_index=True, use_container_width=True)
+        st.dataframe(report, hide_index=True, use_container_width=True)
+
+def st_pyecharts_js(chart, **kwargs):
+    """JsCode(툴팁 formatter 등)가 포함된 pyecharts 차트를 표시합니다.
+
+    st_pyecharts는 dump_options()의 따옴표 없는 함수 때문에 JSON 파싱에 실패하므로,
+    placeholder가 유지되는 dump_options_with_quotes()를 st_echarts로 직접 전달합니다.
+    """
+    return st_echarts(options=json.loads(chart.dump_options_with_quotes()), **kwargs)
+
+CI_BAND_SUFFIX = " 95% CI"
+
+def apc_tooltip_formatter(annotations, intervals=None):
+    """추이 차트 툴팁에 시계열별 95% 신뢰구간과 APC 주석을 덧붙이는 JS formatter를 생성합니다.
+
+    intervals는 {시리즈명: 연도 순서의 [하한, 상한] 목록}이며, 신뢰구간 띠 시리즈 자체는 툴팁에서 생략합니다.
+    """
+    return JsCode(
+        "function (params) {"
+        f"var apc = {json.dumps(annotations, ensure_ascii=False)};"
+        f"var ci = {json.dumps(intervals or {}, ensure_ascii=False)};"
+        "var s = params[0].axisValue;"
+        "params.forEach(function (p) {"
+        f"if (p.seriesName.endsWith({json.dumps(CI_BAND_SUFFIX)})) {{ return; }}"
+        "var v = Array.isArray(p.value) ? p.value[1] : p.value;"
+        "s += '<br/>' + p.marker + p.seriesName + ': <b>' + v + '</b>';"
+        "var b = ci[p.seriesName] && ci[p.seriesName][p.dataIndex];"
+        "if (b && b[0] !== null) { s += ' <span style=\"color:#888\">(' + b[0] + '–' + b[1] + ')</span>'; }"
+        "if (apc[p.seriesName]) { s += ' <span style=\"color:#888\">' + apc[p.seriesName] + '</span>'; }"
+        "});"
+        "return s;"
+        "}"
+    )
+
+def add_ci_band(chart, series_name, lower, upper, color, yaxis_index):
+    """95% 신뢰구간을 하한 + 폭의 누적 영역으로 그립니다. (두 시리즈가 같은 이름이라 범례에서 함께 켜고 끔)"""
+    band_name = series_name + CI_BAND_SUFFIX
+    width = [None if lo is None or hi is None else round(hi - lo, 2) for lo, hi in zip(lower, upper)]
+    for values, opacity in ((lower, 0), (width, 0.15)):
+        chart.add_yaxis(
+            series_name=band_name,
+            y_axis=values,
+            stack=band_name,
+            is_smooth=True,
+            is_symbol_show=False,
+            yaxis_index=yaxis_index,
+            label_opts=opts.LabelOpts(is_show=False),
+            linestyle_opts=opts.LineStyleOpts(width=0, opacity=0),
+            areastyle_opts=opts.AreaStyleOpts(opacity=opacity, color=color),
+            itemstyle_opts=opts.ItemStyleOpts(color=color)
+        )
+
+def ranking_timeline_options(ranking, gender_label, years, rate_label):
+    """모든 연도의 Top 10 순위를 한 번에 담은 ECharts timeline 옵션을 만듭니다.
+
+    축·툴팁 등 공통 설정은 baseOption에 한 번만 두고 연도별 옵션에는 암종명과 값만 담으므로,
+    연도 전환은 브라우저에서 처리되어 rerun이 발생하지 않습니다.
+    """
+    by_year = ranking.filter(pl.col("gender") == gender_label).partition_by("year", as_dict=True)
+    year_options = []
+    for year in years:
+        year_df = by_year.get((year,), ranking.head(0)).sort("rank", descending=True)
+        c_names = year_df["cancer_type"].to_list()
+        year_options.append({
+            "title": {"text": f"{year}년 {gender_label} 암 발생 순위"},
+            "yAxis": {"data": c_names},
+            "series": [{"data": [
+                {"value": round(float(rate), 1), "itemStyle": {"color": get_cancer_color(name)}}
+                for name, rate in zip(c_names, year_df["incidence_rate"].to_list())
+            ]}],
+        })
+    return {
+        "baseOption": {
+            "timeline": {
+                "axisType": "category", "data": [f"{year}년" for year in years], "currentIndex": len(years) - 1,
+                "autoPlay": False, "playInterval": 800, "loop": False, "bottom": 0,
+            },
+            "title": {"subtext": rate_label},
+            "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
+            "grid": {"left": "35%", "right": "10%", "bottom": 80},
+            "xAxis": {"type": "value", "name": "발생률"},
+            "yAxis": {"type": "category", "axisLabel": {"fontSize": 11, "margin": 15}},
+            "series": [{"type": "bar", "name": "발생률", "label": {"show": True, "position": "right"}}],
+        },
+        "options": year_options,
+    }
+
+def proportion_timeline_options(df_prop_agg, gender_label, years):
+    """모든 연도의 연령별 암종 비중을 한 번에 담은 ECharts timeline 옵션을 만듭니다.
+
+    연도마다 Top 5 암종 구성이 달라지므로 가장 많은 연도에 맞춰 시리즈 슬롯을 두고, 남는 슬롯은 비웁니다.
+    """
+    by_year = df_prop_agg.filter(pl.col("gender") == gender_label).partition_by("year", as_dict=True)
+    year_series = []
+    for year in years:
+        union_list, series_data = proportion_series(by_year.get((year,), df_prop_agg.head(0)))
+        year_series.append([
+            {
+                "name": name.replace('(', '\n(') if '(' in name else name,
+                "data": [v if v > 0 else None for v in series_data[name]],
+                "itemStyle": {"color": "#d3d3d3" if name == "기타(Others)" else get_cancer_color(name)},
+            }
+            for name in union_list + ["기타(Others)"]
+        ])
+    slots = max(len(series) for series in year_series)
+    label = {"show": True, "position": "inside", "formatter": "{a}", "fontSize": 10, "color": "#fff"}
+    return {
+        "baseOption": {
+            "timeline": {
+                "axisType": "category", "data": [f"{year}년" for year in years], "currentIndex": len(years) - 1,
+                "autoPlay": False, "playInterval": 800, "loop": False, "bottom": 0,
+            },
+            "tooltip": {"trigger": "item", "formatter": "{a}<br/>{b}: {c}%"},
+            "legend": {"show": False},
+            "grid": {"bottom": 90},
+            "xAxis": {"type": "category", "name": "연령그룹", "data": CUSTOM_AGE_ORDER},
+            "yAxis": {"type": "value", "name": "비중 (%)", "min": 0, "max": 100},
+            "series": [{"type": "bar", "stack": "stack1", "label": label} for _ in range(slots)],
+        },
+        "options": [
+            {
+                "title": {"text": f"{year}년 {gender_label} 연령별 암종 비중 (%)"},
+                "series": series + [{"name": "", "data": []}] * (slots - len(series)),
+            }
+            for year, series in zip(years, year_series)
+        ],
+    }
+
+def _selected_data(generation, region):
+    return _load_snapshot(generation) if region == NATIONAL_REGION else get_region_data(generation, region)
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_ranking_table(generation, region, rate_col):
+    """연도별 Top 10 순위표를 (세대, 지역, 발생률 기준)별로 한 번만 계산합니다."""
+    data = _selected_data(generation, region)
+    if rate_col != "incidence_rate":
+        data = data.with_columns(pl.col(rate_col).alias("incidence_rate"))
+    return build_ranking_table(data)
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_proportion_table(generation, region, year=None):
+    """연령그룹별 암종 비중표를 (세대, 지역, 연도)별로 한 번만 계산합니다. (year 생략 시 전체 연도)"""
+    return build_proportion_table(_selected_data(generation, region), None if year is None else [year])
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_ranking_timeline(generation, region, rate_col, gender_label, years, rate_label):
+    """순위 timeline 옵션 캐시. 다른 위젯을 바꾼 rerun에서는 다시 만들지 않습니다."""
+    return ranking_timeline_options(get_ranking_table(generation, region, rate_col), gender_label, list(years), rate_label)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_proportion_timeline(generation, region, gender_label, years):
+    """비중 timeline 옵션 캐시. (비중은 조발생률 기준이라 발생률 기준과 무관)"""
+    return proportion_timeline_options(get_proportion_table(generation, region), gender_label, list(years))
+
+DETAIL_PAGE_SIZES = [50, 100, 500]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def proportion_detail_table(cache_key, _df_prop_agg):
+    """비중 상세 피벗 테이블을 필터 상태(cache_key)별로 캐싱합니다."""
+    # Create a pivot table for the user to see the actual proportions
+    df_table = _df_prop_agg.pivot(
+        values="proportion",
+        index=["year", "gender", "custom_age_group"],
+        on="cancer_type"
+    ).sort(["year", "gender", "custom_age_group"])
+
+    # Format custom_age_group as categorical for correct sorting in the table
+    return df_table.with_columns(
+        pl.col("custom_age_group").cast(pl.Categorical)
+    )
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def selection_summary_table(cache_key, _filtered_df):
+    """선택 데이터의 요약 통계를 필터 상태(cache_key)별로 캐싱합니다."""
+    return _filtered_df.group_by(["gender", "age_group"]).agg([
+        pl.col("incidence_rate").mean().alias("Avg Rate"),
+        pl.col("incidence_rate").max().alias("Max Rate"),
+        pl.col("cases").sum().alias("Total Cases")
+    ]).sort(["gender", "age_group"])
+
+def render_paginated_table(df, key):
+    """polars DataFrame을 페이지 단위로 잘라 표시합니다. (pandas 변환 없이 Arrow로 전송)"""
+    total = len(df)
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    with col_size:
+        page_size = st.selectbox("페이지당 행 수", DETAIL_PAGE_SIZES, key=f"{key}_page_size")
+    n_pages = max(1, -(-total // page_size))
+    # 필터 변경으로 페이지 수가 줄어든 경우 범위를 맞춰줍니다.
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = n_pages
+    with col_page:
+        page = st.number_input("페이지", min_value=1, max_value=n_pages, key=f"{key}_page")
+    with col_info:
+        st.caption(f"총 {total:,}행 · {n_pages}페이지")
+    st.dataframe(df.slice((page - 1) * page_size, page_size), use_container_width=True)
+
+def render_export_section(frames):
+    """현재 선택 데이터의 다운로드 버튼을 표시합니다. 파일은 버튼을 클릭할 때만 생성됩니다."""
+    fmt = st.radio("파일 형식", list(EXPORT_FORMATS.keys()), horizontal=True, key="export_format")
+    ext, mime = EXPORT_FORMATS[fmt]
+    cols = st.columns(len(frames))
+    for col, (label, (file_stem, get_frame)) in zip(cols, frames.items()):
+        with col:
+            st.download_button(
+                label,
+                data=lambda get_frame=get_frame: export_bytes(get_frame(), fmt),
+                file_name=f"{file_stem}.{ext}",
+                mime=mime,
+                key=f"export_{file_stem}",
+                use_container_width=True
+            )
+
+MAX_SCENARIOS = 5
+
+def default_scenarios(cancer_types):
+    """비교 모드 기본 시나리오: 모든 암 − 갑상선, 모든 암, 위 + 대장 (목록에 있는 암종만 사용)"""
+    all_cancer = [ct for ct in cancer_types if "모든" in ct and "암" in ct][:1]
+    thyroid = [ct for ct in cancer_types if ct.startswith("갑상선")][:1]
+    stomach_colon = [ct for ct in cancer_types if ct.startswith(("위(", "대장"))]
+    return [
+        {"name": "모든 암 − 갑상선", "cancers": all_cancer, "excluded": thyroid},
+        {"name": "모든 암", "cancers": all_cancer, "excluded": []},
+        {"name": "위 + 대장", "cancers": stomach_colon, "excluded": []},
+    ]
+
+def render_scenario_inputs(cancer_types):
+    """비교할 시나리오(이름·암종·제외 암종)를 입력받습니다. 암종이 없는 시나리오는 건너뜁니다."""
+    defaults = default_scenarios(cancer_types)
+    count = st.number_input("시나리오 수", min_value=2, max_value=MAX_SCENARIOS, value=len(defaults), key="scenario_count")
+    scenarios = []
+    cols = st.columns(int(count))
+    for i, col in enumerate(cols):
+        default = defaults[i] if i < len(defaults) else {"name": f"시나리오 {i + 1}", "cancers": [], "excluded": []}
+        with col:
+            name = st.text_input("이름", value=default["name"], key=f"scenario_name_{i}").strip() or f"시나리오 {i + 1}"
+            cancers = st.multiselect("암종", cancer_types, default=default["cancers"], key=f"scenario_cancers_{i}")
+            excluded = []
+            if any("모든" in ct and "암" in ct for ct in cancers):
+                excluded = st.multiselect(
+                    "제외 암종",
+                    [ct for ct in cancer_types if not ("모든" in ct and "암" in ct)],
+                    default=default["excluded"],
+                    key=f"scenario_excluded_{i}"
+                )
+        if cancers:
+            # 이름이 겹치면 그룹 키가 섞이므로 번호를 붙입니다.
+            if any(sc["name"] == name for sc in scenarios):
+                name = f"{name} ({i + 1})"
+            scenarios.append({"name": name, "cancers": cancers, "excluded": excluded})
+    return scenarios
+
+def comparison_chart(comparison_df, names, selected_ages, rate_label):
+    """시나리오 × 성별 × 연령대 시계열을 하나의 추이 차트로 그립니다. (남: 실선, 여: 점선, 95% 신뢰구간 띠)"""
+    colors = ['#5470c6', '#ee6666', '#3ba272', '#fac858', '#9a60b4']
+    years = sorted(comparison_df["year"].unique().to_list())
+    line_chart = Line(init_opts=opts.InitOpts(width="100%", height="600px"))
+    line_chart.add_xaxis(xaxis_data=[str(y) for y in years])
+    ci_intervals = {}
+    for s_idx, name in enumerate(names):
+        color = colors[s_idx % len(colors)]
+        for gender_label, prefix, line_type in (("남자", "남", "solid"), ("여자", "여", "dashed")):
+            for age in selected_ages:
+                series = comparison_df.filter(
+                    (pl.col("selection") == name) & (pl.col("gender") == gender_label) & (pl.col("age_group") == age)
+                )
+                if series.is_empty() or series["cases"].sum() <= 0:
+                    continue
+                by_year = {row["year"]: row for row in series.iter_rows(named=True)}
+                series_name = f"{name} · {prefix}" + (f" ({age})" if len(selected_ages) > 1 else "")
+                line_chart.add_yaxis(
+                    series_name=series_name,
+                    y_axis=[by_year[y]["incidence_rate"] if y in by_year else None for y in years],
+                    is_smooth=True,
+                    symbol_size=6,
+                    label_opts=opts.LabelOpts(is_show=False),
+                    linestyle_opts=opts.LineStyleOpts(width=3, type_=line_type, color=color),
+                    itemstyle_opts=opts.ItemStyleOpts(color=color)
+                )
+                lower = [by_year[y]["rate_lower"] if y in by_year else None for y in years]
+                upper = [by_year[y]["rate_upper"] if y in by_year else None for y in years]
+                ci_intervals[series_name] = [[lo, hi] for lo, hi in zip(lower, upper)]
+                add_ci_band(line_chart, series_name, lower, upper, color, 0)
+    line_chart.set_global_opts(
+        title_opts=opts.TitleOpts(title=f"Scenario Comparison per 100k · {rate_label}", subtitle="Solid: Male, Dashed: Female · Shaded: Poisson 95% CI"),
+        tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="cross", formatter=apc_tooltip_formatter({}, ci_intervals)),
+        legend_opts=opts.LegendOpts(pos_top="10%", orient="horizontal"),
+        xaxis_opts=opts.AxisOpts(name="연도", type_="category", boundary_gap=False),
+        yaxis_opts=opts.AxisOpts(name="발생률", type_="value", is_scale=True, splitline_opts=opts.SplitLineOpts(is_show=True)),
+        datazoom_opts=[
+            opts.DataZoomOpts(type_="slider", range_start=0, range_end=100),
+            opts.DataZoomOpts(type_="inside", range_start=0, range_end=100)
+        ],
+    )
+    return line_chart
+
+def cohort_chart(curves, cancer_type, gender_label, log_scale=False):
+    """출생 코호트별 연령 곡선 (x: 연령대, 계열: 출생연도). 같은 연령에서 최근 코호트가 높으면 코호트 효과입니다."""
+    line_chart = Line(init_opts=opts.InitOpts(width="100%", height="560px"))
+    line_chart.add_xaxis(xaxis_data=COHORT_AGE_GROUPS)
+    for cohort, rates in curves.items():
+        line_chart.add_yaxis(
+            series_name=f"{cohort}년생",
+            y_axis=[None if log_scale and r is not None and r <= 0 else r for r in rates],  # 로그 축은 0 제외
+            is_connect_nones=False,
+            symbol_size=5,
+            label_opts=opts.LabelOpts(is_show=False),
+            linestyle_opts=opts.LineStyleOpts(width=2),
+        )
+    line_chart.set_global_opts(
+        title_opts=opts.TitleOpts(
+            title=f"Birth Cohort Curves · {cancer_type} · {gender_label}",
+            subtitle=f"출생연도 ±{COHORT_BAND_WIDTH // 2}년 코호트의 연령별 발생률 (10만 명당)"
+        ),
+        tooltip_opts=opts.TooltipOpts(trigger="item"),
+        legend_opts=opts.LegendOpts(type_="scroll", pos_top="12%", orient="horizontal"),
+        xaxis_opts=opts.AxisOpts(name="연령대", type_="category", boundary_gap=False),
+        yaxis_opts=opts.AxisOpts(
+            name="발생률", type_="log" if log_scale else "value", splitline_opts=opts.SplitLineOpts(is_show=True)
+        ),
+    )
+    return line_chart
+
+def rate_heatmap(matrix, measure, gender_label, show_change, rate_label):
+    """암종 × 연도 히트맵 (발생률 또는 전년 대비 변화율 %). 최근 연도 발생률이 높은 암종이 위에 옵니다."""
+    rows = matrix.filter((pl.col("measure") == measure) & (pl.col("gender") == gender_label))
+    rows = rows.sort(rate_matrix_years(rows)[-1], nulls_last=False)
+    values_df = rate_matrix_changes(rows) if show_change else rows
+    years = rate_matrix_years(values_df)
+    cancers = values_df["cancer_type"].to_list()
+    cells = values_df.select(years).with_row_index("y").unpivot(
+        index="y", variable_name="year", value_name="value"
+    ).drop_nulls("value").select([
+        pl.col("year").replace_strict(years, range(len(years)), return_dtype=pl.Int64),
+        pl.col("y").cast(pl.Int64),
+        pl.col("value"),
     ])
-    
-    # 최종 결합
-    final_df = pl.concat([
-        age_seg_df.select(["year", "gender", "age_group", "cancer_type", "cases", "incidence_rate", "population"]),
-        total_df.select(["year", "gender", "age_group", "cancer_type", "cases", "incidence_rate", "population"])
-    ]).sort(["year", "gender", "age_group", "cancer_type"])
-    
-    return final_df
+    values = cells["value"]
+    if show_change:
+        # 변화율은 0을 중심으로 대칭인 색 범위 (극단값은 95분위수에서 자름)
+        limit = max(round(values.abs().quantile(0.95) or 0, 0), 1.0)
+        visual = opts.VisualMapOpts(
+            min_=-limit, max_=limit, range_color=["#3b6fb6", "#f7f7f7", "#d6404e"],
+            is_calculable=True, orient="horizontal", pos_left="center", pos_bottom="0%"
+        )
+        unit, series_name = "%", "전년 대비 변화율"
+    else:
+        visual = opts.VisualMapOpts(
+            min_=0, max_=float(values.max() or 1), range_color=["#fff5eb", "#fd8d3c", "#7f2704"],
+            is_calculable=True, orient="horizontal", pos_left="center", pos_bottom="0%"
+        )
+        unit, series_name = "", rate_label
+    tooltip = JsCode(
+        f"function (p) {{ var c = {json.dumps(cancers, ensure_ascii=False)}; var y = {json.dumps(years)}; "
+        f"return c[p.value[1]] + '<br/>' + y[p.value[0]] + '년: ' + p.value[2] + '{unit}'; }}"
+    )
+    heatmap = HeatMap(init_opts=opts.InitOpts(width="100%", height=f"{max(420, 24 * len(cancers) + 160)}px"))
+    heatmap.add_xaxis(years)
+    heatmap.add_yaxis(series_name, cancers, cells.rows(), label_opts=opts.LabelOpts(is_show=False))
+    heatmap.set_global_opts(
+        title_opts=opts.TitleOpts(
+            title=f"{gender_label} 암종 × 연도 {'전년 대비 변화율 (%)' if show_change else '발생률'}", subtitle=rate_label
+        ),
+        tooltip_opts=opts.TooltipOpts(formatter=tooltip),
+        legend_opts=opts.LegendOpts(is_show=False),
+        visualmap_opts=visual,
+        xaxis_opts=opts.AxisOpts(type_="category", name="연도", splitarea_opts=opts.SplitAreaOpts(is_show=True)),
+        yaxis_opts=opts.AxisOpts(type_="category", splitarea_opts=opts.SplitAreaOpts(is_show=True)),
+    )
+    return heatmap
+
+async def _get_processed_data_async(refresh=False):
+    """레지스트리의 모든 테이블을 하나의 스케줄러로 동시에 수집하고 파생 테이블을 만듭니다.
+
+    테이블별 정제 결과는 개별 캐싱되며, refresh=True이면 모두 KOSIS에서 다시 받습니다.
+    """
+    return await datasets.build_snapshot_tables(API_KEY, get_setting=get_setting, refresh=refresh)
 
 def main():
     # Hero Section
@@ -260,7 +710,8 @@ def main():
         </div>
         """, unsafe_allow_html=True)
 
-    if not API_KEY:
+    # 오프라인 fixture(KOSIS_FIXTURE)를 지정한 경우에는 API 키 없이 실행합니다.
+    if not API_KEY and not get_setting(datasets.FIXTURE_SETTING):
         st.error("🔑 **KOSIS_API_KEY not found.**")
         st.info("Streamlit Cloud의 App Settings > Secrets에 `KOSIS_API_KEY = 'your_key_here'`를 추가해주세요.")
         return
@@ -276,8 +727,23 @@ def main():
         st.warning("API 키가 유효한지 또는 KOSIS 서버가 정상인지 확인해주세요.")
         return
 
+    # 이전 버전 스냅샷(ASR·신뢰구간 컬럼 없음)은 새 세대로 다시 만듭니다.
+    if any(c not in data.columns for c in PROCESSED_COLUMNS):
+        rebuild_snapshot()
+
+    generation = snapshot.current_generation()
+
     # Filter Section
     st.markdown("### 🔍 Search Filters")
+
+    # 시도별 데이터가 게시된 경우에만 지역 선택 표시 (선택한 지역 파티션만 읽음)
+    region = NATIONAL_REGION
+    regions = snapshot.list_partition_values("region_processed", generation, "region")
+    if regions:
+        region = st.selectbox("지역 (시도)", [NATIONAL_REGION] + regions, key="region")
+        if region != NATIONAL_REGION:
+            data = get_region_data(generation, region)
+
     col1, col2 = st.columns([1, 2])
     
     with col1:
@@ -319,64 +785,44 @@ def main():
             default=["계(전체)"] if "계(전체)" in age_groups else age_groups[:1]
         )
 
+        rate_mode = st.radio(
+            "발생률 기준",
+            ["조발생률 (Crude)", "연령표준화 발생률 (ASR)"],
+            horizontal=True,
+            key="rate_mode",
+            help="연령표준화 발생률은 '계(전체)' 항목에 적용되며, 개별 연령대는 조발생률과 같습니다."
+        )
+        asr_standard = None
+        if rate_mode == "연령표준화 발생률 (ASR)":
+            asr_standard = st.selectbox(
+                "표준인구",
+                list(STANDARD_LABELS.keys()),
+                format_func=STANDARD_LABELS.get,
+                key="asr_standard"
+            )
+
+    rate_col = asr_column(asr_standard) if asr_standard else "incidence_rate"
+    rate_label = f"ASR ({STANDARD_LABELS[asr_standard]})" if asr_standard else "Crude"
+
     # Sidebar Fallback
     st.sidebar.markdown("### Search Info")
     st.sidebar.info("차트 하단의 슬라이더를 통해 분석 기간을 자유롭게 조정할 수 있습니다.")
+    if st.sidebar.button("🔄 KOSIS 데이터 새로 받기", help="새 세대의 스냅샷을 게시하며, 모든 프로세스가 다음 상호작용부터 새 데이터를 사용합니다."):
+        rebuild_snapshot(refresh=True)
+    client_years = st.sidebar.toggle(
+        "⚡ 브라우저에서 연도 전환",
+        value=True,
+        key="client_year_switch",
+        help="순위·비중 차트의 모든 연도 데이터를 한 번에 보내고, 차트 하단 타임라인으로 연도를 바꿉니다. (서버 rerun 없음)"
+    )
+    render_validation_report(generation)
+
+    # 상세 테이블 캐시 키 (스냅샷 세대 + 필터 상태). ASR 모드에서는 계(전체) 발생률이 표준인구별 ASR로 바뀌므로 rate_col 포함
+    filter_key = (generation, region, rate_col, tuple(selected_cancers), tuple(excluded_cancers), tuple(selected_ages))
 
     # Apply Filters (excluding year range as it's handled by Pyecharts slider)
-    if not selected_cancers:
-        filtered_df = pl.DataFrame()
-    elif is_all_cancer_selected:
-        # 1. 모든암 모드 (리스트에 모든암이 포함된 경우, 첫 번째 모든암 항목 기준)
-        primary_all_cancer = [ct for ct in selected_cancers if "모든" in ct and "암" in ct][0]
-        all_cancer_df = data.filter(
-            (pl.col("cancer_type") == primary_all_cancer) &
-            (pl.col("age_group").is_in(selected_ages))
-        )
-        
-        if excluded_cancers:
-            exclude_df = data.filter(
-                (pl.col("cancer_type").is_in(excluded_cancers)) &
-                (pl.col("age_group").is_in(selected_ages))
-            )
-            exclude_sum = exclude_df.group_by(["year", "gender", "age_group"]).agg(
-                pl.col("cases").sum().alias("exclude_cases")
-            )
-            filtered_df = all_cancer_df.join(exclude_sum, on=["year", "gender", "age_group"], how="left").with_columns(
-                pl.col("exclude_cases").fill_null(0)
-            ).with_columns(
-                (pl.col("cases") - pl.col("exclude_cases")).alias("cases")
-            ).with_columns(
-                (pl.when(pl.col("population") > 0)
-                 .then((pl.col("cases") / pl.col("population")) * 100000)
-                 .otherwise(0.0))
-                .round(2).alias("incidence_rate")
-            ).drop("exclude_cases")
-        else:
-            filtered_df = all_cancer_df
-    else:
-        # 2. 개별 암종 복수 선택 및 합산 모드
-        base_filtered = data.filter(
-            (pl.col("cancer_type").is_in(selected_cancers)) &
-            (pl.col("age_group").is_in(selected_ages))
-        )
-        
-        if len(selected_cancers) > 1:
-            # 여러 개 선택 시 합산
-            filtered_df = base_filtered.group_by(["year", "gender", "age_group"]).agg([
-                pl.col("cases").sum(),
-                pl.col("population").first() # 동일 그룹이면 인구는 같음
-            ]).with_columns(
-                (pl.when(pl.col("population") > 0)
-                 .then((pl.col("cases") / pl.col("population")) * 100000)
-                 .otherwise(0.0))
-                .round(2).alias("incidence_rate")
-            ).with_columns(
-                pl.lit(", ".join(selected_cancers)).alias("cancer_type")
-            )
-        else:
-            # 단일 선택 시 그대로 사용
-            filtered_df = base_filtered
+    filtered_df = apply_selection(data, selected_cancers, excluded_cancers, selected_ages, asr_standard)
+    rank_data = data.with_columns(pl.col(rate_col).alias("incidence_rate")) if asr_standard else data
     # Section: Trends
     st.markdown("<br>", unsafe_allow_html=True)
     col_icon1, col_text1 = st.columns([1, 15])
@@ -401,10 +847,44 @@ def main():
         colors_female = ['#ee6666', '#fac858', '#fc8452', '#ea7ccc', '#9a60b4']
         
         years = sorted(filtered_df["year"].unique().to_list())
-        x_data = [str(y) for y in years]
+
+        # 추계인구 기반 예측 (점선으로 연장)
+        show_forecast = st.toggle(f"{FORECAST_END_YEAR}년까지 예측 표시 (추계인구 기반)", key="show_forecast")
+        forecast_df = pl.DataFrame()
+        if show_forecast:
+            forecast_all = get_forecast(generation, region)
+            if forecast_all is None:
+                st.info("현재 스냅샷에는 인구 추계가 없습니다. 사이드바에서 데이터를 새로 받으면 예측을 사용할 수 있습니다.")
+            else:
+                forecast_df = apply_selection(forecast_all, selected_cancers, excluded_cancers, selected_ages, asr_standard)
+        forecast_years = sorted(forecast_df["year"].unique().to_list()) if not forecast_df.is_empty() else []
+        x_data = [str(y) for y in years + forecast_years]
+
+        # 표시 중인 시계열의 APC/AAPC (툴팁 주석)
+        apc_annotations = {}
+        for row in compute_trend_stats(filtered_df, ["gender", "age_group"]).iter_rows(named=True):
+            if row["aapc"] is None:
+                continue
+            prefix = "남" if row["gender"] == "남자" else "여"
+            note = f"AAPC {row['aapc']:+.1f}%"
+            if row["joinpoint_year"] is not None:
+                note += f" · {row['joinpoint_year']}년 이후 APC {row['apc_recent']:+.1f}%"
+            apc_annotations[f"{prefix} ({row['age_group']})"] = note
         
         line_chart = Line(init_opts=opts.InitOpts(width="100%", height="650px"))
         line_chart.add_xaxis(xaxis_data=x_data)
+
+        # 관측 발생률의 Poisson 95% 신뢰구간 (선택 집계·ASR 포함, apply_selection에서 계산)
+        ci_intervals = {}
+
+        def add_observed_ci(gender_df, age, series_name, color, yaxis_index):
+            bounds = {
+                row["year"]: (row["rate_lower"], row["rate_upper"])
+                for row in gender_df.filter(pl.col("age_group") == age).select(["year"] + CI_COLUMNS).iter_rows(named=True)
+            }
+            lower, upper = zip(*(bounds.get(y, (None, None)) for y in years))
+            ci_intervals[series_name] = [list(b) for b in zip(lower, upper)]
+            add_ci_band(line_chart, series_name, list(lower), list(upper), color, yaxis_index)
         
         # Add Male Series
         male_df = filtered_df.filter(pl.col("gender") == "남자")
@@ -430,6 +910,7 @@ def main():
                         linestyle_opts=opts.LineStyleOpts(width=3, color=colors_male[i % len(colors_male)]),
                         itemstyle_opts=opts.ItemStyleOpts(color=colors_male[i % len(colors_male)])
                     )
+                    add_observed_ci(male_df, age, f"남 ({age})", colors_male[i % len(colors_male)], 0)
         
         # Add Female Series
         female_df = filtered_df.filter(pl.col("gender") == "여자")
@@ -455,6 +936,36 @@ def main():
                         linestyle_opts=opts.LineStyleOpts(width=3, color=colors_female[i % len(colors_female)]),
                         itemstyle_opts=opts.ItemStyleOpts(color=colors_female[i % len(colors_female)])
                     )
+                    add_observed_ci(
+                        female_df, age, f"여 ({age})", colors_female[i % len(colors_female)], 1 if use_dual_axis else 0
+                    )
+
+        def add_forecast_series(gender_label, prefix, colors, yaxis_index):
+            gender_forecast = forecast_df.filter(pl.col("gender") == gender_label)
+            gender_last = filtered_df.filter((pl.col("gender") == gender_label) & (pl.col("year") == years[-1]))
+            for i, age in enumerate(selected_ages):
+                age_forecast = gender_forecast.filter(pl.col("age_group") == age)
+                if age_forecast.is_empty():
+                    continue
+                forecast_dict = dict(zip(age_forecast["year"].to_list(), age_forecast["incidence_rate"].to_list()))
+                last_obs = gender_last.filter(pl.col("age_group") == age)["incidence_rate"].to_list()
+                # 마지막 관측 연도부터 이어 그려 실선과 점선이 연결되도록 합니다.
+                y_vals = [None] * (len(years) - 1) + [float(last_obs[0]) if last_obs else None]
+                y_vals += [float(forecast_dict.get(y) or 0) for y in forecast_years]
+                line_chart.add_yaxis(
+                    series_name=f"{prefix} ({age}) 예측",
+                    y_axis=y_vals,
+                    is_smooth=True,
+                    symbol_size=4,
+                    yaxis_index=yaxis_index,
+                    label_opts=opts.LabelOpts(is_show=False),
+                    linestyle_opts=opts.LineStyleOpts(width=2, type_="dashed", color=colors[i % len(colors)]),
+                    itemstyle_opts=opts.ItemStyleOpts(color=colors[i % len(colors)])
+                )
+
+        if forecast_years:
+            add_forecast_series("남자", "남", colors_male, 0)
+            add_forecast_series("여자", "여", colors_female, 1 if use_dual_axis else 0)
 
         # Axis Setup
         yaxis_primary = opts.AxisOpts(
@@ -479,8 +990,8 @@ def main():
             st.info("💡 남/여 발생률 차이가 커서 우측 보조축을 사용합니다.")
 
         line_chart.set_global_opts(
-            title_opts=opts.TitleOpts(title="Annual Incidence per 100k", subtitle="Solid: Male, Dashed: Female"),
-            tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="cross"),
+            title_opts=opts.TitleOpts(title=f"Annual Incidence per 100k · {rate_label}" + (f" · {region}" if region != NATIONAL_REGION else ""), subtitle=("Dashed: Forecast" if forecast_years else "Solid: Male, Dashed: Female") + " · Shaded: Poisson 95% CI"),
+            tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="cross", formatter=apc_tooltip_formatter(apc_annotations, ci_intervals)),
             legend_opts=opts.LegendOpts(pos_top="10%", orient="horizontal"),
             xaxis_opts=opts.AxisOpts(name="연도", type_="category", boundary_gap=False),
             yaxis_opts=yaxis_primary,
@@ -490,7 +1001,66 @@ def main():
             ],
         )
         
-        st_pyecharts(line_chart, height="680px", key="chart_merged_v_final")
+        st_pyecharts_js(line_chart, height="680px", key="chart_merged_v_final")
+
+        with st.expander("📈 가장 빠르게 증가하는 암종 (APC / AAPC)", expanded=False):
+            st.caption("로그선형 회귀(조인포인트 최대 1개) 기준 연간 변화율입니다. 열 제목을 눌러 정렬할 수 있습니다.")
+            rising_df = get_trend_stats(generation, rate_col, region).filter(
+                (pl.col("age_group").is_in(selected_ages)) &
+                (~pl.col("cancer_type").str.contains("모든 ?암"))
+            ).sort("aapc", descending=True, nulls_last=True)
+            st.dataframe(
+                rising_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "cancer_type": "암종",
+                    "gender": "성별",
+                    "age_group": "연령대",
+                    "apc": st.column_config.NumberColumn("APC (전체 기간, %)", format="%+.2f"),
+                    "aapc": st.column_config.NumberColumn("AAPC (%)", format="%+.2f"),
+                    "apc_recent": st.column_config.NumberColumn("최근 구간 APC (%)", format="%+.2f"),
+                    "joinpoint_year": st.column_config.NumberColumn("조인포인트", format="%d"),
+                    "n_years": "관측 연도 수",
+                }
+            )
+
+        # 출생 코호트 분석: 세대별 코호트 테이블에서 암종·성별 곡선만 꺼내므로 전환 시 재계산이 없습니다.
+        cohort_expander = st.expander("🧬 출생 코호트 분석 (Age-Period-Cohort)", expanded=False, key="cohort_expander", on_change="rerun")
+        if cohort_expander.open:
+            with cohort_expander:
+                site_types = [ct for ct in cancer_types if "모든" not in ct]
+                cohort_options = [ct for ct in cancer_types if ct not in site_types] + site_types
+                c_col1, c_col2, c_col3 = st.columns([3, 2, 1])
+                with c_col1:
+                    cohort_cancer = st.selectbox(
+                        "암종", cohort_options,
+                        index=cohort_options.index(selected_cancers[0]) if selected_cancers else 0,
+                        key="cohort_cancer"
+                    )
+                with c_col2:
+                    cohort_gender = st.radio("성별", ["남자", "여자"], horizontal=True, key="cohort_gender")
+                with c_col3:
+                    cohort_log = st.toggle("로그 축", key="cohort_log")
+                curves = get_cohort_curves(generation, region, cohort_cancer, cohort_gender)
+                if not curves:
+                    st.info("코호트 곡선을 그릴 연령대별 데이터가 없습니다.")
+                else:
+                    st.caption("5세 연령대 × 연도 발생률(조발생률)을 출생연도 대각선으로 재배열했습니다. 85세 이상 개방형 연령대는 제외합니다.")
+                    st_pyecharts(cohort_chart(curves, cohort_cancer, cohort_gender, cohort_log), height="600px", key="chart_cohort")
+
+        # 시나리오 비교: 여러 선택을 한 번의 집계로 계산해 같은 차트에 겹쳐 그립니다. (연령대·발생률 기준은 위 필터를 따름)
+        comparison_df = None
+        if st.toggle("🆚 시나리오 비교 모드", key="compare_mode", help="여러 암종 조합(합산/제외)을 한 차트에서 비교합니다."):
+            scenarios = render_scenario_inputs(cancer_types)
+            comparison_df = apply_comparison(data, scenarios, selected_ages, asr_standard)
+            if comparison_df.is_empty():
+                st.info("비교할 시나리오의 암종을 선택해주세요.")
+            else:
+                st_pyecharts_js(
+                    comparison_chart(comparison_df, [sc["name"] for sc in scenarios], selected_ages, rate_label),
+                    height="630px", key="chart_comparison"
+                )
 
         # New Section: Top 10 Cancers by Gender
         st.markdown("<br><hr>", unsafe_allow_html=True)
@@ -504,7 +1074,15 @@ def main():
         
         all_years = sorted(data["year"].unique().to_list())
         
-        if mode == "정적 분석 (연도 선택)":
+        if mode == "정적 분석 (연도 선택)" and client_years:
+            # 모든 연도의 순위를 한 번에 보내고 연도 전환은 ECharts timeline에서 처리합니다.
+            col_rank_m, col_rank_f = st.columns(2)
+            with col_rank_m:
+                st_echarts(cached_ranking_timeline(generation, region, rate_col, "남자", tuple(all_years), rate_label), height="540px", key="rank_m_timeline")
+            with col_rank_f:
+                st_echarts(cached_ranking_timeline(generation, region, rate_col, "여자", tuple(all_years), rate_label), height="540px", key="rank_f_timeline")
+
+        elif mode == "정적 분석 (연도 선택)":
             ranking_year = st.select_slider(
                 "분석 연도 선택",
                 options=all_years,
@@ -512,7 +1090,7 @@ def main():
                 key="ranking_year_slider"
             )
             
-            ranking_df = data.filter(
+            ranking_df = rank_data.filter(
                 (pl.col("year") == ranking_year) & 
                 (pl.col("age_group") == "계(전체)") &
                 (~pl.col("cancer_type").str.contains("모든 ?암"))
@@ -546,7 +1124,7 @@ def main():
                 )
                 bar.reversal_axis()
                 bar.set_global_opts(
-                    title_opts=opts.TitleOpts(title=f"{ranking_year}년 {gender_label} 암 발생 순위"),
+                    title_opts=opts.TitleOpts(title=f"{ranking_year}년 {gender_label} 암 발생 순위", subtitle=rate_label),
                     xaxis_opts=opts.AxisOpts(name="발생률", is_show=True),
                     yaxis_opts=opts.AxisOpts(
                         name="", 
@@ -603,7 +1181,7 @@ def main():
                             )
                             .reversal_axis()
                             .set_global_opts(
-                                title_opts=opts.TitleOpts(title=f"{year}년 {gender_label} 암 발생 순위"),
+                                title_opts=opts.TitleOpts(title=f"{year}년 {gender_label} 암 발생 순위", subtitle=rate_label),
                                 xaxis_opts=opts.AxisOpts(name="발생률", is_show=True),
                                 yaxis_opts=opts.AxisOpts(
                                     name="", 
@@ -620,9 +1198,25 @@ def main():
 
             col_race_m, col_race_f = st.columns(2)
             with col_race_m:
-                st_pyecharts(create_race_chart(data, "남자"), height="550px", key="race_male")
+                st_pyecharts(create_race_chart(rank_data, "남자"), height="550px", key="race_male")
             with col_race_f:
-                st_pyecharts(create_race_chart(data, "여자"), height="550px", key="race_female")
+                st_pyecharts(create_race_chart(rank_data, "여자"), height="550px", key="race_female")
+
+        # 연도별 변화 히트맵: 수집 시 만든 발생률 행렬 하나로 전체 기간을 한 차트에 그립니다. (연도별 rerun 없음)
+        heatmap_expander = st.expander("🗺️ 암종 × 연도 발생률·전년 대비 변화율 히트맵", expanded=False, key="heatmap_expander", on_change="rerun")
+        if heatmap_expander.open:
+            with heatmap_expander:
+                h_col1, h_col2 = st.columns(2)
+                with h_col1:
+                    heatmap_gender = st.radio("성별", ["남자", "여자"], horizontal=True, key="heatmap_gender")
+                with h_col2:
+                    heatmap_value = st.radio("값", ["발생률", "전년 대비 변화율 (%)"], horizontal=True, key="heatmap_value")
+                rate_matrix = get_rate_matrix(generation, region)
+                if rate_matrix.filter((pl.col("measure") == rate_col) & (pl.col("gender") == heatmap_gender)).is_empty():
+                    st.info("히트맵을 그릴 데이터가 없습니다.")
+                else:
+                    heatmap = rate_heatmap(rate_matrix, rate_col, heatmap_gender, heatmap_value != "발생률", rate_label)
+                    st_pyecharts_js(heatmap, height=heatmap.height, key="chart_rate_heatmap")
 
         # New Section: Incidence Proportion by Age Group
         st.markdown("<br><hr>", unsafe_allow_html=True)
@@ -632,103 +1226,36 @@ def main():
         with col_text3:
             st.subheader("Cancer Incidence Proportion by Age Group")
         
-        prop_year = st.select_slider(
-            "분석 연도 선택 (비중 차트)",
-            options=all_years,
-            value=max(all_years),
-            key="prop_year_slider"
-        )
-        
-        # Data transformation for Proportion Chart
-        df_prop = data.filter(
-            (pl.col("year") == prop_year) & 
-            (pl.col("age_group") != "계(전체)") &
-            (~pl.col("cancer_type").str.contains("모든 ?암"))
-        ).with_columns(
-            pl.col("age_group").map_elements(map_to_custom_age_group, return_dtype=pl.String).alias("custom_age_group")
-        ).filter(pl.col("custom_age_group").is_not_null())
-        
         # Ensure population column exists (defensive)
-        if "population" not in df_prop.columns:
-            st.error("데이터에 'population' 컬럼이 누락되었습니다. 캐시를 새로고침합니다.")
-            st.cache_data.clear()
-            st.rerun()
-        
-        # Aggregate by custom age group (First sum cases and population, then calculate rate)
-        df_prop_agg = df_prop.group_by(["gender", "custom_age_group", "cancer_type"]).agg([
-            pl.col("cases").sum().alias("cases_sum"),
-            pl.col("population").sum().alias("pop_sum")
-        ]).with_columns(
-            ((pl.col("cases_sum") / pl.col("pop_sum")) * 100000).round(2).alias("custom_incidence_rate")
-        )
-        
-        # Calculate proportion (%) based on custom incidence rates within each (gender, custom_age_group)
-        df_prop_agg = df_prop_agg.with_columns(
-            (pl.col("custom_incidence_rate") / pl.col("custom_incidence_rate").sum().over(["gender", "custom_age_group"]) * 100).round(1).alias("proportion")
-        )
-        
-        custom_age_order = ["0-19세", "20-39세", "40-49세", "50-59세", "60세+"]
-        
-        from pyecharts.charts import Pie
-        
+        if "population" not in data.columns:
+            st.error("데이터에 'population' 컬럼이 누락되었습니다. 스냅샷을 새로 만듭니다.")
+            rebuild_snapshot()
+
+        if client_years:
+            # 모든 연도의 비중을 한 번에 계산해 보내고, 연도 전환은 브라우저에서 처리합니다.
+            prop_year = None
+            df_prop_agg = get_proportion_table(generation, region)
+        else:
+            prop_year = st.select_slider(
+                "분석 연도 선택 (비중 차트)",
+                options=all_years,
+                value=max(all_years),
+                key="prop_year_slider"
+            )
+            df_prop_agg = get_proportion_table(generation, region, prop_year)
+
         def create_stacked_bar_chart(df, gender_label):
             gender_df = df.filter(pl.col("gender") == gender_label)
             if gender_df.is_empty():
                 return None
-            
-            # 1. Identify Top 5 per age group
-            age_top5_map = {}
-            all_top_cancers_union = set()
-            
-            for age in custom_age_order:
-                age_subset = gender_df.filter(pl.col("custom_age_group") == age)
-                if age_subset.is_empty():
-                    age_top5_map[age] = []
-                    continue
-                
-                # Get top 5 cancers for THIS age group
-                top5 = (
-                    age_subset.sort("proportion", descending=True)
-                    .head(5)["cancer_type"].to_list()
-                )
-                age_top5_map[age] = top5
-                for c in top5:
-                    all_top_cancers_union.add(c)
-            
-            # Sort the union set by the MAX proportion it achieves in any age group
-            # This helps ensure that the 'most dominant' cancer in any group is likely to be at the bottom
-            cancer_ranks = []
-            for c in all_top_cancers_union:
-                max_prop = gender_df.filter(pl.col("cancer_type") == c)["proportion"].max()
-                cancer_ranks.append({"name": c, "max_prop": max_prop or 0})
-            
-            union_list = [item["name"] for item in sorted(cancer_ranks, key=lambda x: x["max_prop"], reverse=True)]
-            
-            # 2. Prepare data for each series
-            series_data = {c: [0.0] * len(custom_age_order) for c in union_list}
-            series_data["기타(Others)"] = [0.0] * len(custom_age_order)
-            
-            for idx, age in enumerate(custom_age_order):
-                age_subset = gender_df.filter(pl.col("custom_age_group") == age)
-                top5_for_this_age = age_top5_map.get(age, [])
-                
-                # Proportions for Top 5
-                age_top5_data = age_subset.filter(pl.col("cancer_type").is_in(top5_for_this_age))
-                age_top5_dict = dict(zip(age_top5_data["cancer_type"].to_list(), age_top5_data["proportion"].to_list()))
-                
-                # Update series_data for Top 5
-                for c in top5_for_this_age:
-                    series_data[c][idx] = float(age_top5_dict.get(c, 0))
-                
-                # Proportions for Others (all cancers NOT in Top 5 for this specific bar)
-                age_others_data = age_subset.filter(~pl.col("cancer_type").is_in(top5_for_this_age))
-                series_data["기타(Others)"][idx] = round(float(age_others_data["proportion"].sum()), 1)
-            
-            # 3. Build Chart
+
+            union_list, series_data = proportion_series(gender_df)
+
+            # Build Chart
             # Stack order: Largest in union on bottom, Others on top
             # add_yaxis calls are stacked bottom to top.
             bar = Bar(init_opts=opts.InitOpts(width="100%", height="550px"))
-            bar.add_xaxis(custom_age_order)
+            bar.add_xaxis(CUSTOM_AGE_ORDER)
             
             for s_name in union_list:
                 # Filter for this series
@@ -779,52 +1306,49 @@ def main():
             return bar
 
         col_prop_m, col_prop_f = st.columns(2)
-        with col_prop_m:
-            chart_m = create_stacked_bar_chart(df_prop_agg, "남자")
-            if chart_m:
-                st_pyecharts(chart_m, height="600px", key=f"stack_m_{prop_year}")
-            else:
-                st.warning("데이터가 없습니다.")
-                
-        with col_prop_f:
-            chart_f = create_stacked_bar_chart(df_prop_agg, "여자")
-            if chart_f:
-                st_pyecharts(chart_f, height="600px", key=f"stack_f_{prop_year}")
-            else:
-                st.warning("데이터가 없습니다.")
+        for col, gender_label, gender_key in [(col_prop_m, "남자", "m"), (col_prop_f, "여자", "f")]:
+            with col:
+                if df_prop_agg.filter(pl.col("gender") == gender_label).is_empty():
+                    st.warning("데이터가 없습니다.")
+                elif client_years:
+                    st_echarts(cached_proportion_timeline(generation, region, gender_label, tuple(all_years)), height="640px", key=f"stack_{gender_key}_timeline")
+                else:
+                    st_pyecharts(create_stacked_bar_chart(df_prop_agg, gender_label), height="600px", key=f"stack_{gender_key}_{prop_year}")
         
         st.info("💡 가장 비중이 큰 암종부터 아래에서 위로 쌓이며, 기타(Others) 항목은 항상 맨 위에 표시됩니다.")
 
-        with st.expander("📝 연령별 암 발생 비중 상세 데이터 보기", expanded=False):
-            # Create a pivot table for the user to see the actual proportions
-            df_table = df_prop_agg.pivot(
-                values="proportion", 
-                index=["gender", "custom_age_group"], 
-                on="cancer_type"
-            ).sort(["gender", "custom_age_group"])
-            
-            # Format custom_age_group as categorical for correct sorting in the table
-            gender_order = ["남자", "여자"]
-            df_table = df_table.with_columns(
-                pl.col("custom_age_group").cast(pl.Categorical)
-            )
-            
-            st.dataframe(df_table.to_pandas(), use_container_width=True)
+        # 상세 테이블은 expander가 열려 있을 때만 계산합니다.
+        prop_expander = st.expander("📝 연령별 암 발생 비중 상세 데이터 보기", expanded=False, key="prop_detail_expander", on_change="rerun")
+        if prop_expander.open:
+            with prop_expander:
+                df_table = proportion_detail_table((generation, region, prop_year), df_prop_agg)
+                render_paginated_table(df_table, key="prop_detail")
 
         st.markdown("<br>", unsafe_allow_html=True)
 
         # Bottom Data View (Collapsed by default)
-        with st.expander("📊 상세 데이터 및 요약 통계 보기 (Detailed Data & Stats)", expanded=False):
-            tab1, tab2 = st.tabs(["📊 Data Table", "📋 Summary Stats"])
-            with tab1:
-                st.dataframe(filtered_df.to_pandas(), use_container_width=True)
-            with tab2:
-                summary = filtered_df.group_by(["gender", "age_group"]).agg([
-                    pl.col("incidence_rate").mean().alias("Avg Rate"),
-                    pl.col("incidence_rate").max().alias("Max Rate"),
-                    pl.col("cases").sum().alias("Total Cases")
-                ]).sort(["gender", "age_group"])
-                st.dataframe(summary.to_pandas(), use_container_width=True)
+        detail_expander = st.expander("📊 상세 데이터 및 요약 통계 보기 (Detailed Data & Stats)", expanded=False, key="detail_expander", on_change="rerun")
+        if detail_expander.open:
+            with detail_expander:
+                tab1, tab2 = st.tabs(["📊 Data Table", "📋 Summary Stats"], key="detail_tabs", on_change="rerun")
+                if tab1.open:
+                    with tab1:
+                        render_paginated_table(filtered_df, key="detail_data")
+                if tab2.open:
+                    with tab2:
+                        summary = selection_summary_table(filter_key, filtered_df)
+                        st.dataframe(summary, use_container_width=True)
+
+        with st.expander("📥 데이터 내보내기 (Parquet / Arrow / CSV)", expanded=False):
+            export_frames = {
+                "현재 선택 데이터": ("filtered_data", lambda: filtered_df),
+                (f"{prop_year}년 연령별 비중" if prop_year else "연도별 연령별 비중"): (f"age_proportion_{prop_year or 'all'}", lambda: df_prop_agg),
+                "연도별 Top 10 순위": ("ranking_top10", lambda: get_ranking_table(generation, region, rate_col)),
+                "전체 데이터셋": ("cancer_incidence_full", lambda: data),
+            }
+            if comparison_df is not None and not comparison_df.is_empty():
+                export_frames["시나리오 비교"] = ("scenario_comparison", lambda: comparison_df)
+            render_export_section(export_frames)
     else:
         st.warning("No data found.")
 
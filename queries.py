@@ -0,0 +1,231 @@
+import numpy as np
+import polars as pl
+
+from analytics import STANDARD_POPULATIONS, CI_COLUMNS, asr_column, asr_var_column, rate_ci, asr_ci
+
+# 선택·집계 쿼리: Streamlit 앱(main.py)과 HTTP API(api.py)가 같은 결과를 내도록 공유합니다.
+
+
+def map_to_custom_age_group(age):
+    """정규화된 연령대를 요청된 5개 그룹으로 매핑합니다."""
+    if age in ["0-4", "5-9", "10-14", "15-19"]:
+        return "0-19세"
+    elif age in ["20-24", "25-29", "30-34", "35-39"]:
+        return "20-39세"
+    elif age in ["40-44", "45-49"]:
+        return "40-49세"
+    elif age in ["50-54", "55-59"]:
+        return "50-59세"
+    elif age in ["60-64", "65-69", "70-74", "75-79", "80-84", "85+"]:
+        return "60세+"
+    return None
+
+
+CUSTOM_AGE_ORDER = ["0-19세", "20-39세", "40-49세", "50-59세", "60세+"]
+
+
+def build_proportion_table(data, years=None):
+    """연도·성별·연령그룹별 암종 발생률(95% 신뢰구간 포함)과 그룹 내 비중(%)을 계산합니다. (years 생략 시 전체 연도)"""
+    df_prop = data.filter(
+        (pl.col("age_group") != "계(전체)") &
+        (~pl.col("cancer_type").str.contains("모든 ?암"))
+    )
+    if years is not None:
+        df_prop = df_prop.filter(pl.col("year").is_in(years))
+    df_prop = df_prop.with_columns(
+        pl.col("age_group").map_elements(map_to_custom_age_group, return_dtype=pl.String).alias("custom_age_group")
+    ).filter(pl.col("custom_age_group").is_not_null())
+
+    # Aggregate by custom age group (First sum cases and population, then calculate rate)
+    df_prop_agg = df_prop.group_by(["year", "gender", "custom_age_group", "cancer_type"]).agg([
+        pl.col("cases").sum().alias("cases_sum"),
+        pl.col("population").sum().alias("pop_sum")
+    ]).with_columns(
+        [((pl.col("cases_sum") / pl.col("pop_sum")) * 100000).round(2).alias("custom_incidence_rate")] +
+        [ci.name.prefix("custom_") for ci in rate_ci("cases_sum", "pop_sum")]
+    )
+
+    # Calculate proportion (%) based on custom incidence rates within each (year, gender, custom_age_group)
+    return df_prop_agg.with_columns(
+        (pl.col("custom_incidence_rate") / pl.col("custom_incidence_rate").sum().over(["year", "gender", "custom_age_group"]) * 100).round(1).alias("proportion")
+    )
+
+
+def ranking_rows(data):
+    """순위표와 연도별 발생률 행렬이 공유하는 행 (계(전체) 기준, 모든암 제외)."""
+    return data.filter(
+        (pl.col("age_group") == "계(전체)") &
+        (~pl.col("cancer_type").str.contains("모든 ?암"))
+    )
+
+
+def build_ranking_table(data, top_n=10):
+    """연도·성별 암종 발생률 순위표(계(전체) 기준, 모든암 제외)를 생성합니다."""
+    return ranking_rows(data).with_columns(
+        pl.col("incidence_rate").rank(method="ordinal", descending=True).over(["year", "gender"]).alias("rank")
+    ).filter(pl.col("rank") <= top_n).select(
+        ["year", "gender", "rank", "cancer_type", "cases", "population", "incidence_rate"]
+    ).sort(["year", "gender", "rank"])
+
+
+# 연도별 발생률 행렬: (측정값, 성별, 암종) 행 × 연도 열. 측정값은 조발생률과 표준인구별 ASR
+RATE_MATRIX_KEYS = ["measure", "gender", "cancer_type"]
+RATE_MATRIX_MEASURES = ["incidence_rate"] + [asr_column(standard) for standard in STANDARD_POPULATIONS]
+
+
+def rate_matrix_years(matrix):
+    return [c for c in matrix.columns if c not in RATE_MATRIX_KEYS]
+
+
+def build_rate_matrix(data):
+    """순위표와 같은 행으로 연도별 발생률 wide 행렬을 만듭니다.
+
+    수집 시 전체 처리 데이터로 매번 다시 만듭니다. (과거 연도 자료가 수정되어도 그대로 반영, 피벗 한 번이라 비용이 작음)
+    """
+    return ranking_rows(data).sort("year").unpivot(
+        index=["year", "gender", "cancer_type"], on=RATE_MATRIX_MEASURES, variable_name="measure", value_name="rate"
+    ).pivot(
+        values="rate", index=RATE_MATRIX_KEYS, on="year", aggregate_function="first"
+    ).sort(RATE_MATRIX_KEYS)
+
+
+def rate_matrix_changes(matrix):
+    """연도별 발생률 행렬의 전년 대비 변화율(%) 행렬. (첫 연도 제외, 전년 값이 0·누락이면 null)"""
+    years = rate_matrix_years(matrix)
+    values = matrix.select(years).to_numpy().astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        changes = np.where(values[:, :-1] > 0, (values[:, 1:] / values[:, :-1] - 1) * 100, np.nan)
+    return pl.concat([
+        matrix.select(RATE_MATRIX_KEYS),
+        pl.DataFrame(changes, schema=years[1:], orient="row").with_columns(pl.all().fill_nan(None).round(1))
+    ], how="horizontal")
+
+
+def apply_selection(frame, selected_cancers, excluded_cancers, selected_ages, asr_standard=None):
+    """암종 선택(합산/제외)과 연령대 필터를 적용합니다. (연도 범위는 Pyecharts 슬라이더에서 처리)
+
+    합산·차감한 행은 발생자수와 ASR 분산으로 95% 신뢰구간(rate_lower/rate_upper)을 다시 계산합니다.
+    """
+    asr_cols = [asr_column(standard) for standard in STANDARD_POPULATIONS]
+    asr_var_cols = [asr_var_column(standard) for standard in STANDARD_POPULATIONS]
+    is_all_cancer_selected = any("모든" in ct and "암" in ct for ct in selected_cancers)
+
+    if not selected_cancers:
+        filtered_df = pl.DataFrame()
+    elif is_all_cancer_selected:
+        # 1. 모든암 모드 (리스트에 모든암이 포함된 경우, 첫 번째 모든암 항목 기준)
+        primary_all_cancer = [ct for ct in selected_cancers if "모든" in ct and "암" in ct][0]
+        all_cancer_df = frame.filter(
+            (pl.col("cancer_type") == primary_all_cancer) &
+            (pl.col("age_group").is_in(selected_ages))
+        )
+
+        if excluded_cancers:
+            exclude_df = frame.filter(
+                (pl.col("cancer_type").is_in(excluded_cancers)) &
+                (pl.col("age_group").is_in(selected_ages))
+            )
+            exclude_sum = exclude_df.group_by(["year", "gender", "age_group"]).agg(
+                [pl.col("cases").sum().alias("exclude_cases")] +
+                [pl.col(c).sum().alias(f"exclude_{c}") for c in asr_cols + asr_var_cols]
+            )
+            filtered_df = all_cancer_df.join(exclude_sum, on=["year", "gender", "age_group"], how="left").with_columns(
+                [pl.col("exclude_cases").fill_null(0)] +
+                [pl.col(f"exclude_{c}").fill_null(0) for c in asr_cols + asr_var_cols]
+            ).with_columns(
+                [(pl.col("cases") - pl.col("exclude_cases")).alias("cases")] +
+                [(pl.col(c) - pl.col(f"exclude_{c}")).round(2).alias(c) for c in asr_cols] +
+                [(pl.col(c) - pl.col(f"exclude_{c}")).alias(c) for c in asr_var_cols]
+            ).with_columns(
+                [(pl.when(pl.col("population") > 0)
+                 .then((pl.col("cases") / pl.col("population")) * 100000)
+                 .otherwise(0.0))
+                .round(2).alias("incidence_rate")] + rate_ci()
+            ).drop(["exclude_cases"] + [f"exclude_{c}" for c in asr_cols + asr_var_cols])
+        else:
+            filtered_df = all_cancer_df
+    else:
+        # 2. 개별 암종 복수 선택 및 합산 모드
+        base_filtered = frame.filter(
+            (pl.col("cancer_type").is_in(selected_cancers)) &
+            (pl.col("age_group").is_in(selected_ages))
+        )
+
+        if len(selected_cancers) > 1:
+            # 여러 개 선택 시 합산
+            filtered_df = base_filtered.group_by(["year", "gender", "age_group"]).agg([
+                pl.col("cases").sum(),
+                pl.col("population").first() # 동일 그룹이면 인구는 같음
+            ] + [pl.col(c).sum().round(2) for c in asr_cols] + [pl.col(c).sum() for c in asr_var_cols]).with_columns(
+                [(pl.when(pl.col("population") > 0)
+                 .then((pl.col("cases") / pl.col("population")) * 100000)
+                 .otherwise(0.0))
+                .round(2).alias("incidence_rate")] + rate_ci()
+            ).with_columns(
+                pl.lit(", ".join(selected_cancers)).alias("cancer_type")
+            )
+        else:
+            # 단일 선택 시 그대로 사용
+            filtered_df = base_filtered
+
+    return apply_asr_mode(filtered_df, asr_standard)
+
+
+def apply_asr_mode(filtered_df, asr_standard):
+    """ASR 모드: 전체 연령 행의 발생률과 신뢰구간을 선택한 표준인구 기준 값으로 대체 (ASR은 암종 간 합산/차감이 가능)"""
+    if not asr_standard or filtered_df.is_empty():
+        return filtered_df
+    is_total = pl.col("age_group") == "계(전체)"
+    return filtered_df.with_columns(
+        [pl.when(is_total)
+         .then(pl.col(asr_column(asr_standard)))
+         .otherwise(pl.col("incidence_rate"))
+         .alias("incidence_rate")] +
+        [pl.when(is_total).then(limit).otherwise(pl.col(name)).alias(name)
+         for limit, name in zip(asr_ci(asr_standard), CI_COLUMNS)]
+    )
+
+
+def selection_members(scenarios):
+    """시나리오별 구성 암종과 부호(+1 합산, −1 차감)를 (selection, cancer_type, sign) 테이블로 만듭니다.
+
+    apply_selection과 같은 규칙입니다: 모든암이 포함되면 첫 번째 모든암에서 제외 암종을 빼고, 아니면 선택 암종을 합산합니다.
+    """
+    rows = []
+    for scenario in scenarios:
+        all_cancers = [ct for ct in scenario["cancers"] if "모든" in ct and "암" in ct]
+        if all_cancers:
+            rows.append((scenario["name"], all_cancers[0], 1.0))
+            rows += [(scenario["name"], ct, -1.0) for ct in dict.fromkeys(scenario["excluded"])]
+        else:
+            rows += [(scenario["name"], ct, 1.0) for ct in dict.fromkeys(scenario["cancers"])]
+    return pl.DataFrame(
+        rows, schema={"selection": pl.String, "cancer_type": pl.String, "sign": pl.Float64}, orient="row"
+    )
+
+
+def apply_comparison(frame, scenarios, selected_ages, asr_standard=None):
+    """여러 시나리오를 한 번의 필터·조인·집계로 계산합니다. (selection이 추가 그룹 키)
+
+    원자료는 시나리오 수와 관계없이 한 번만 필터링하고, 시나리오가 늘어도 늘어나는 것은
+    (구성 암종 × 연령대 × 연도) 조인 행 수뿐입니다. 발생률·신뢰구간은 apply_selection과 같은 방식으로 다시 계산합니다.
+    """
+    members = selection_members(scenarios)
+    if members.is_empty():
+        return pl.DataFrame()
+    asr_cols = [asr_column(standard) for standard in STANDARD_POPULATIONS]
+    asr_var_cols = [asr_var_column(standard) for standard in STANDARD_POPULATIONS]
+    signed = lambda c: (pl.col(c) * pl.col("sign")).sum()
+    compared = frame.filter(
+        (pl.col("cancer_type").is_in(members["cancer_type"].unique().implode())) &
+        (pl.col("age_group").is_in(selected_ages))
+    ).join(members, on="cancer_type", how="inner").group_by(["selection", "year", "gender", "age_group"]).agg([
+        signed("cases").alias("cases"),
+        pl.col("population").first() # 동일 그룹이면 인구는 같음
+    ] + [signed(c).round(2).alias(c) for c in asr_cols] + [signed(c).alias(c) for c in asr_var_cols]).with_columns(
+        [(pl.when(pl.col("population") > 0)
+         .then((pl.col("cases") / pl.col("population")) * 100000)
+         .otherwise(0.0))
+        .round(2).alias("incidence_rate")] + rate_ci()
+    ).sort(["selection", "gender", "age_group", "year"])
+    return apply_asr_mode(compared, asr_standard)
@@ -0,0 +1,194 @@
+"""규모 확장 점검 (합성 데이터, 단계별 최대 메모리·시간 예산)
+
+synthetic.py로 현재 규모의 여러 배수 데이터를 만들어 수집·정제 → 파생 테이블 → 검증 → 스냅샷 게시 → 통계 → 앱 필터
+단계를 실행하고, 단계별 tracemalloc 최대치(Python 힙), RSS 최대 증가량(polars/Arrow 네이티브 메모리 포함), 소요 시간을
+예산과 비교합니다. 예산을 넘는 단계가 있으면 종료 코드 1로 끝납니다. 배수마다 새 프로세스에서 실행해 RSS가 섞이지 않게 합니다.
+
+    python scaletest.py --multiples 1 2 4 8
+    python scaletest.py --multiples 1 4 --regions 17 --single-year-ages
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+# 현재 규모(1배, 시도·1세별 없음)의 원자료 레코드 수. 예산은 이 대비 볼륨 비율에 비례해 늘어납니다.
+BASE_RECORDS = 16_156
+
+# 단계별 예산: 항목 → (고정분, 볼륨 1배당 증가분). 볼륨 v에서 한도 = 고정분 + 증가분 × v
+# 1·2·4·8배와 17개 시도 + 1세별 연령(볼륨 ~26·41배)에서 측정한 기울기의 2~3배로 정해, 선형 증가는 통과하고
+# 볼륨보다 빠르게 늘어나는 단계(급격한 악화)는 걸리도록 했습니다. 시간은 tracemalloc 추적 부하를 포함한 값입니다.
+STAGE_BUDGETS = {
+    "generate": {"seconds": (2.0, 10.0), "py_mb": (5, 25), "rss_mb": (20, 50)},
+    "load": {"seconds": (1.0, 3.0), "py_mb": (10, 100), "rss_mb": (50, 200)},
+    "derive": {"seconds": (0.2, 0.1), "py_mb": (5, 1), "rss_mb": (20, 20)},
+    "validate": {"seconds": (0.2, 0.02), "py_mb": (5, 1), "rss_mb": (20, 5)},
+    "publish": {"seconds": (0.2, 0.3), "py_mb": (5, 1), "rss_mb": (20, 5)},
+    "analytics": {"seconds": (0.3, 0.2), "py_mb": (5, 15), "rss_mb": (30, 15)},
+    "filters": {"seconds": (0.3, 0.1), "py_mb": (5, 1), "rss_mb": (20, 5)},
+}
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def rss_mb():
+    """현재 RSS (Linux는 /proc, 그 외에는 최대 RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+@contextlib.contextmanager
+def track_stage(name, results, interval=RSS_SAMPLE_INTERVAL):
+    """with 블록의 소요 시간, tracemalloc 최대치, RSS 최대 증가량을 results에 기록합니다.
+
+    tracemalloc은 Python 객체 할당만 보므로 polars/Arrow 버퍼는 백그라운드 스레드의 RSS 표본으로 잡습니다.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    py_start = tracemalloc.get_traced_memory()[0]
+    rss_start = rss_mb()
+    rss_peak = [rss_start]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            rss_peak[0] = max(rss_peak[0], rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        done.set()
+        sampler.join()
+        results.append({
+            "stage": name,
+            "seconds": seconds,
+            "py_mb": (tracemalloc.get_traced_memory()[1] - py_start) / 2**20,
+            "rss_mb": max(rss_peak[0], rss_mb()) - rss_start,
+        })
+
+
+def budget_violations(results, volume, budgets=STAGE_BUDGETS):
+    """예산을 넘은 (단계, 항목, 측정치, 한도) 목록."""
+    violations = []
+    for result in results:
+        for metric, (fixed, per_volume) in budgets.get(result["stage"], {}).items():
+            limit = fixed + per_volume * volume
+            if result[metric] > limit:
+                violations.append((result["stage"], metric, result[metric], limit))
+    return violations
+
+
+def run_scale(multiple, regions=0, single_year_ages=False, seed=0):
+    """한 배수에서 전체 파이프라인과 앱 필터를 단계별로 측정합니다. 반환값: (레코드 수, 단계별 결과)"""
+    import polars as pl
+
+    import datasets
+    import snapshot
+    import synthetic
+    from analytics import compute_forecast, compute_trend_stats
+    from queries import (
+        apply_comparison, apply_selection, build_proportion_table, build_ranking_table, build_rate_matrix
+    )
+
+    # fixture·스냅샷은 실행마다 수백 MB가 될 수 있으므로 끝나면 지웁니다.
+    with tempfile.TemporaryDirectory(prefix="cancertrend-scale-") as workdir:
+        snapshot.SNAPSHOT_DIR = os.path.join(workdir, "snapshot")
+        fixture = os.path.join(workdir, "fixture.json")
+        results = []
+
+        with track_stage("generate", results):
+            counts = synthetic.write_fixture(
+                fixture, seed=seed, multiple=multiple, regions=regions, single_year_ages=single_year_ages
+            )
+
+        # 앱의 _get_processed_data_async(datasets.build_snapshot_tables)와 같은 단계를 나누어 측정합니다.
+        settings = {datasets.FIXTURE_SETTING: fixture}
+        with track_stage("load", results):
+            tables, reports = asyncio.run(datasets.load_tables(None, get_setting=settings.get))
+        with track_stage("derive", results):
+            derived = datasets.build_derived_tables(tables)
+            derived["rate_matrix"] = build_rate_matrix(derived["processed"])
+        with track_stage("validate", results):
+            reports += datasets.validate_derived_tables(tables, derived)
+            derived["validation"] = pl.concat(reports)
+        derived["population"] = tables["population"]
+        if "region_processed" in derived:
+            derived["region_population"] = tables["region_population"]
+        with track_stage("publish", results):
+            generation = datasets.publish_snapshot(derived)
+        del tables, derived, reports
+
+        data = snapshot.load_generation(generation)
+        population = snapshot.load_artifact("population", generation)
+        with track_stage("analytics", results):
+            compute_trend_stats(data, ["cancer_type", "gender", "age_group"])
+            compute_forecast(data, population, datasets.FORECAST_END_YEAR)
+
+        # main()의 필터 경로: 모든암 − 제외, 여러 암종 합산(ASR), 시나리오 비교, 순위, 연령그룹 비중
+        cancer_types = data["cancer_type"].unique().sort().to_list()
+        all_cancer = [ct for ct in cancer_types if "모든" in ct][:1]
+        sites = [ct for ct in cancer_types if "모든" not in ct]
+        ages = data["age_group"].unique().to_list()
+        regions = snapshot.list_partition_values("region_processed", generation, "region") if regions else []
+        with track_stage("filters", results):
+            apply_selection(data, all_cancer, sites[:2], ages)
+            apply_selection(data, sites[:3], [], ages, "segi")
+            apply_comparison(data, [
+                {"name": "a", "cancers": all_cancer, "excluded": sites[:1]},
+                {"name": "b", "cancers": sites[:2], "excluded": []},
+                {"name": "c", "cancers": sites[2:5], "excluded": []},
+            ], ages)
+            build_ranking_table(data)
+            build_proportion_table(data)
+            if regions:
+                datasets.load_region_processed(generation, regions[0])
+        return sum(counts.values()), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--multiples", type=int, nargs="+", default=[1, 2, 4, 8], help="암종 수 배수")
+    parser.add_argument("--regions", type=int, default=0, help="시도별 테이블에 포함할 시도 수")
+    parser.add_argument("--single-year-ages", action="store_true", help="인구를 1세별로 생성")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'x':>3} {'records':>9} {'volume':>7}  {'stage':<10} {'time(s)':>8} {'py(MB)':>8} {'rss(MB)':>8}")
+    for multiple in args.multiples:
+        # 배수마다 새 프로세스 (이전 배수에서 늘어난 RSS가 다음 측정에 섞이지 않도록)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            records, results = pool.submit(run_scale, multiple, args.regions, args.single_year_ages).result()
+        volume = records / BASE_RECORDS
+        violations = budget_violations(results, volume)
+        over = {stage for stage, *_ in violations}
+        for result in results:
+            flag = "  OVER BUDGET" if result["stage"] in over else ""
+            print(
+                f"{multiple:>3} {records:>9} {volume:>7.1f}  {result['stage']:<10} {result['seconds']:>8.3f} "
+                f"{result['py_mb']:>8.1f} {result['rss_mb']:>8.1f}{flag}",
+                flush=True
+            )
+        for stage, metric, value, limit in violations:
+            print(f"    ! {stage} {metric}: {value:.2f} > {limit:.2f}")
+        failed = failed or bool(violations)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
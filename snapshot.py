@@ -0,0 +1,212 @@
+import os
+import shutil
+import time
+
+import polars as pl
+import pyarrow as pa
+
+# 여러 Streamlit 워커 프로세스가 공유하는 Arrow IPC 스냅샷 저장소
+# 파일 구성:
+#   processed-<gen>.arrow : 세대(generation)별 가공 데이터 (비압축 IPC → mmap 가능)
+#   <name>-<gen>.arrow    : 같은 세대의 부속 테이블 (인구 추계, 추세 통계 등)
+#   <name>-<gen>/k=v/...  : 파티션 데이터셋 (hive 형식 Parquet, 필터 시 파티션 단위로 가지치기)
+#   CURRENT               : 현재 세대 번호 (원자적 교체)
+#   build.lock            : 최초 빌드를 한 워커만 수행하도록 하는 잠금 파일
+#   tables/<name>-<key>.arrow : 원천 테이블별 정제 결과 캐시 (세대와 무관, 요청 정의가 바뀌면 key가 바뀜)
+SNAPSHOT_DIR = os.getenv("CANCERTREND_SNAPSHOT_DIR", ".snapshot")
+KEEP_GENERATIONS = 2
+LOCK_STALE_SECONDS = 600
+
+
+def _path(name, base_dir=None):
+    return os.path.join(base_dir or SNAPSHOT_DIR, name)
+
+
+def _atomic_write(path, data):
+    """임시 파일에 기록한 뒤 os.replace로 교체하여 읽는 쪽이 중간 상태를 보지 않도록 합니다."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def current_generation(base_dir=None):
+    """현재 게시된 세대 번호를 반환합니다. 스냅샷이 없으면 None."""
+    try:
+        with open(_path("CURRENT", base_dir), "r", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load_generation(generation, base_dir=None):
+    """지정 세대의 스냅샷을 읽기 전용 memory-map으로 열어 DataFrame으로 반환합니다.
+
+    수치 컬럼은 페이지 캐시를 그대로 참조하므로 워커 수가 늘어도 노드당 메모리가 일정합니다.
+    """
+    return _read_mmap(_path(f"processed-{generation}.arrow", base_dir))
+
+
+def _read_mmap(path):
+    source = pa.memory_map(path, "r")
+    return pl.from_arrow(pa.ipc.open_file(source).read_all())
+
+
+def publish(df, base_dir=None, artifacts=None, partitioned=None):
+    """새 세대로 스냅샷을 게시하고 세대 번호를 반환합니다.
+
+    artifacts({이름: DataFrame})는 같은 세대의 부속 테이블로, partitioned({이름: (DataFrame, 파티션 컬럼)})는
+    파티션 데이터셋으로 함께 기록되며, 모두 CURRENT 교체 전에 완성됩니다.
+    """
+    base_dir = base_dir or SNAPSHOT_DIR
+    os.makedirs(base_dir, exist_ok=True)
+    generation = (current_generation(base_dir) or 0) + 1
+
+    # 데이터 파일을 먼저 완성한 뒤 CURRENT를 교체 (CURRENT가 가리키는 파일은 항상 완전함)
+    data_path = _path(f"processed-{generation}.arrow", base_dir)
+    tmp = f"{data_path}.{os.getpid()}.tmp"
+    df.write_ipc(tmp, compression="uncompressed")
+    os.replace(tmp, data_path)
+    for name, artifact in (artifacts or {}).items():
+        _write_artifact(artifact, _path(f"{name}-{generation}.arrow", base_dir))
+    for name, (frame, partition_by) in (partitioned or {}).items():
+        _write_partitioned(frame, partition_by, _path(f"{name}-{generation}", base_dir))
+    _atomic_write(_path("CURRENT", base_dir), str(generation).encode("utf-8"))
+
+    # 오래된 세대 정리 (이미 mmap 중인 워커는 unlink 후에도 기존 매핑을 계속 사용)
+    for name in os.listdir(base_dir):
+        stem = name[:-len(".arrow")] if name.endswith(".arrow") else name
+        if "-" not in stem:
+            continue
+        try:
+            gen = int(stem[stem.rindex("-") + 1:])
+        except ValueError:
+            continue
+        if gen <= generation - KEEP_GENERATIONS:
+            path = _path(name, base_dir)
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+    return generation
+
+
+def load_or_build_artifact(name, generation, build_fn, base_dir=None):
+    """세대에 종속된 파생 테이블(<name>-<gen>.arrow)을 읽거나, 없으면 만들어 함께 저장합니다.
+
+    먼저 만든 워커의 결과를 다른 워커가 그대로 mmap 하므로 파생 계산은 세대당 한 번만 수행됩니다.
+    동시에 만들더라도 원자적 교체이므로 읽는 쪽은 항상 완전한 파일을 봅니다.
+    """
+    base_dir = base_dir or SNAPSHOT_DIR
+    path = _path(f"{name}-{generation}.arrow", base_dir)
+    if not os.path.exists(path):
+        os.makedirs(base_dir, exist_ok=True)
+        _write_artifact(build_fn(), path)
+    return _read_mmap(path)
+
+
+def load_artifact(name, generation, base_dir=None):
+    """게시된 부속 테이블을 mmap으로 읽습니다. 없으면 None."""
+    path = _path(f"{name}-{generation}.arrow", base_dir)
+    if not os.path.exists(path):
+        return None
+    return _read_mmap(path)
+
+
+def scan_partitioned(name, generation, base_dir=None):
+    """파티션 데이터셋을 LazyFrame으로 엽니다. 파티션 컬럼에 대한 필터는 해당 디렉터리만 읽도록 가지치기됩니다."""
+    path = _path(f"{name}-{generation}", base_dir)
+    if not os.path.isdir(path):
+        return None
+    return pl.scan_parquet(os.path.join(path, "**", "*.parquet"), hive_partitioning=True)
+
+
+def list_partition_values(name, generation, key, base_dir=None):
+    """최상위 파티션 키의 값 목록을 디렉터리 이름에서 읽습니다. (데이터를 열지 않음)"""
+    path = _path(f"{name}-{generation}", base_dir)
+    if not os.path.isdir(path):
+        return []
+    prefix = f"{key}="
+    return sorted(d[len(prefix):] for d in os.listdir(path) if d.startswith(prefix))
+
+
+def _write_partitioned(df, partition_by, path):
+    # 임시 디렉터리에 완성한 뒤 이름을 바꿔, 읽는 쪽이 일부만 기록된 데이터셋을 보지 않도록 합니다.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for keys, part in df.partition_by(partition_by, as_dict=True, maintain_order=True).items():
+        part_dir = os.path.join(tmp, *(f"{k}={v}" for k, v in zip(partition_by, keys)))
+        os.makedirs(part_dir, exist_ok=True)
+        part.drop(partition_by).write_parquet(os.path.join(part_dir, "part-0.parquet"))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def _write_artifact(df, path):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.write_ipc(tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def load_table_cache(name, key, base_dir=None):
+    """원천 테이블의 정제 결과 캐시를 읽습니다. 없으면 None."""
+    path = _path(os.path.join("tables", f"{name}-{key}.arrow"), base_dir)
+    if not os.path.exists(path):
+        return None
+    return _read_mmap(path)
+
+
+def save_table_cache(name, key, df, base_dir=None):
+    """원천 테이블의 정제 결과를 캐시하고, 같은 테이블의 이전 key 캐시는 지웁니다."""
+    table_dir = _path("tables", base_dir)
+    os.makedirs(table_dir, exist_ok=True)
+    _write_artifact(df, os.path.join(table_dir, f"{name}-{key}.arrow"))
+    for entry in os.listdir(table_dir):
+        if entry.startswith(f"{name}-") and entry.endswith(".arrow") and entry != f"{name}-{key}.arrow":
+            try:
+                os.remove(os.path.join(table_dir, entry))
+            except OSError:
+                pass
+
+
+def acquire_build_lock(base_dir=None):
+    """빌드 잠금을 시도합니다. 다른 워커가 빌드 중이면 False."""
+    base_dir = base_dir or SNAPSHOT_DIR
+    os.makedirs(base_dir, exist_ok=True)
+    lock_path = _path("build.lock", base_dir)
+    try:
+        if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(fd, str(os.getpid()).encode("utf-8"))
+    os.close(fd)
+    return True
+
+
+def release_build_lock(base_dir=None):
+    try:
+        os.remove(_path("build.lock", base_dir))
+    except OSError:
+        pass
+
+
+def wait_for_generation(timeout, base_dir=None, poll=0.5, after=None):
+    """다른 워커가 스냅샷을 게시할 때까지 기다립니다. after를 주면 그보다 새 세대를 기다립니다. 시간 초과 시 None."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        generation = current_generation(base_dir)
+        if generation is not None and (after is None or generation > after):
+            return generation
+        time.sleep(poll)
+    return None
@@ -0,0 +1,213 @@
+import argparse
+import copy
+import json
+import math
+import os
+import random
+
+# KOSIS 응답 형식(api_samples.json)을 본뜬 결정적 합성 데이터 생성기
+# 오프라인 fixture(KOSIS_FIXTURE)로 사용해 API 없이 앱·부하 테스트를 실행하고,
+# 암종 수 배수(multiple)·시도별 테이블(regions)·1세별 인구(single_year_ages)로 규모를 키워 확장성을 점검합니다.
+SAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_samples.json")
+
+# 인구 연령 코드 (DT_1BPA001 objL3). 1999년은 80세 이상이 하나의 개방형 연령대로만 제공됩니다.
+POP_AGES = [
+    ("040", "0 - 4세"), ("050", "5 - 9세"), ("070", "10 - 14세"), ("100", "15 - 19세"),
+    ("120", "20 - 24세"), ("130", "25 - 29세"), ("150", "30 - 34세"), ("160", "35 - 39세"),
+    ("180", "40 - 44세"), ("190", "45 - 49세"), ("210", "50 - 54세"), ("230", "55 - 59세"),
+    ("260", "60 - 64세"), ("280", "65 - 69세"), ("310", "70 - 74세"), ("330", "75 - 79세"),
+    ("360", "80 - 84세"), ("380", "85 - 89세"), ("410", "90 - 94세"), ("430", "95 - 99세"),
+    ("440", "100세 이상"),
+]
+POP_OPEN_AGE = ("340", "80세 이상")
+POP_OPEN_AGE_YEARS = [1999]
+
+# 암발생 연령 코드 (DT_117N_A0024 objL3)
+CANCER_AGES = [(f"15117AC0011{i:02d}", label) for i, label in enumerate([
+    "0-4세", "5-9세", "10-14세", "15-19세", "20-24세", "25-29세", "30-34세", "35-39세", "40-44세",
+    "45-49세", "50-54세", "55-59세", "60-64세", "65-69세", "70-74세", "75-79세", "80-84세", "85세이상"
+], start=2)]
+
+# 암종: (이름, 기준 발생 가중치, 연간 변화율, 남녀 가중치)
+CANCERS = [
+    ("위(C16)", 1.6, -0.03, (1.0, 0.5)), ("간(C22)", 1.0, -0.02, (1.0, 0.35)),
+    ("폐(C33-C34)", 1.3, 0.01, (1.0, 0.45)), ("대장(C18-C20)", 1.2, 0.01, (1.0, 0.7)),
+    ("유방(C50)", 0.9, 0.04, (0.01, 1.0)), ("갑상선(C73)", 0.8, 0.06, (0.3, 1.0)),
+    ("전립선(C61)", 0.7, 0.06, (1.0, 0.0)), ("췌장(C25)", 0.4, 0.02, (1.0, 0.9)),
+    ("담낭 및 기타 담도(C23-C24)", 0.35, 0.0, (1.0, 0.9)), ("신장(C64)", 0.3, 0.03, (1.0, 0.5)),
+    ("방광(C67)", 0.25, 0.0, (1.0, 0.25)), ("백혈병(C91-C95)", 0.15, 0.01, (1.0, 0.8)),
+    ("비호지킨 림프종(C82-C86 C96)", 0.2, 0.02, (1.0, 0.8)), ("식도(C15)", 0.2, -0.02, (1.0, 0.1)),
+    ("자궁경부(C53)", 0.25, -0.03, (0.0, 1.0)),
+]
+ALL_CANCER = "모든암(C00-C96)"
+
+GENDERS = [("1", "11101SSB21", "남자", "Male"), ("2", "11101SSB22", "여자", "Female")]
+
+# 시도: (KOSIS 명칭, 인구 비중). 시도별 테이블에는 전국 합계 행도 함께 들어 있습니다.
+REGIONS = [
+    ("서울특별시", 0.185), ("부산광역시", 0.064), ("대구광역시", 0.046), ("인천광역시", 0.058),
+    ("광주광역시", 0.028), ("대전광역시", 0.028), ("울산광역시", 0.021), ("세종특별자치시", 0.008),
+    ("경기도", 0.264), ("강원특별자치도", 0.030), ("충청북도", 0.031), ("충청남도", 0.041),
+    ("전북특별자치도", 0.034), ("전라남도", 0.035), ("경상북도", 0.050), ("경상남도", 0.063),
+    ("제주특별자치도", 0.013),
+]
+NATIONAL = "전국"
+
+
+def _templates(samples_path=SAMPLES_PATH):
+    with open(samples_path, "r", encoding="utf-8") as f:
+        samples = json.load(f)
+    return samples["api1"][0], samples["api2"][0]
+
+
+def _record(template, **fields):
+    record = copy.copy(template)
+    record.update(fields)
+    return record
+
+
+def _population(age_index, gender_index, year):
+    """연령대·연도별 인구 (고령층은 빠르게 증가, 저연령층은 감소)."""
+    base = 2_000_000 * math.exp(-0.012 * max(age_index - 10, 0) ** 2) * (0.97 if gender_index == 0 else 1.0)
+    trend = 1 + (year - 1999) * 0.006 * (age_index - 9)
+    return max(base * trend, 2_000.0)
+
+
+def _cancer_sites(multiple):
+    """multiple배로 늘린 암종 목록. 추가 암종은 원래 암종의 변형(이름 뒤에 #번호)입니다."""
+    sites = []
+    for r in range(multiple):
+        for c, (name, weight, growth, sex_weight) in enumerate(CANCERS):
+            code = f"15117AC0012{r:01d}{c + 1:02d}" if r < 10 else f"15117AC{r:03d}{c + 1:02d}"
+            sites.append((code, name if r == 0 else f"{name} #{r + 1}", weight, growth, sex_weight))
+    return sites
+
+
+def _single_year_ages(band_label, total):
+    """5세 연령대 인구를 1세별로 나눕니다. (연령이 높을수록 조금씩 감소, 합계 보존)"""
+    low = int(band_label.split("-")[0].strip())
+    weights = [1 - 0.02 * (k - 2) for k in range(5)]
+    return [(f"{low + k}세", total * w / sum(weights)) for k, w in enumerate(weights)]
+
+
+def generate(
+    seed=0, start_year=1999, last_observed_year=2023, end_year=2040, samples_path=SAMPLES_PATH,
+    multiple=1, regions=0, single_year_ages=False
+):
+    """KOSIS 형식의 인구(추계 포함)·암발생 레코드를 생성합니다. 같은 인자는 항상 같은 결과를 냅니다.
+
+    multiple: 암종 수 배수 (암발생 레코드가 거의 비례해 늘어남)
+    regions: 시도별 인구·암발생 테이블에 포함할 시도 수 (0이면 생성하지 않음, 최대 17)
+    single_year_ages: 인구를 1세별(0세~99세, 100세 이상)로 제공 (1999년 80세 이상 개방형 연령대는 유지)
+    반환값: {"population": [...], "cancer": [...], ["region_population": [...], "region_cancer": [...]]}
+    (load_fixture가 읽는 형식)
+    """
+    rng = random.Random(seed)
+    region_rng = random.Random(seed + 1)
+    pop_template, cancer_template = _templates(samples_path)
+    region_list = REGIONS[:regions]
+    share_total = sum(share for _, share in region_list) or 1.0
+
+    def pop_records(year, g, code, label, label_eng, value):
+        records = [_record(
+            pop_template, PRD_DE=str(year), C2=GENDERS[g][0], C2_NM=GENDERS[g][2], C2_NM_ENG=GENDERS[g][3],
+            C3=code, C3_NM=label, C3_NM_ENG=label_eng, DT=str(round(value))
+        )]
+        if region_list:
+            # 시도별 테이블: C1=시도, C2=성별, C3=연령 (전국 합계 행 포함)
+            for region, share in [(NATIONAL, share_total)] + region_list:
+                records.append(_record(
+                    pop_template, PRD_DE=str(year), C1=region, C1_NM=region, C2=GENDERS[g][0], C2_NM=GENDERS[g][2],
+                    C2_NM_ENG=GENDERS[g][3], C3=code, C3_NM=label, C3_NM_ENG=label_eng,
+                    DT=str(round(value * share / share_total))
+                ))
+        return records
+
+    population, region_population = [], []
+
+    def add_population(*args):
+        national, *regional = pop_records(*args)
+        population.append(national)
+        region_population.extend(regional)
+
+    for year in range(start_year, end_year + 1):
+        for g in range(len(GENDERS)):
+            ages = list(enumerate(POP_AGES))
+            if year in POP_OPEN_AGE_YEARS:
+                # 80세 이상은 구성 연령대 합계 하나로만 제공
+                open_total = sum(_population(i, g, year) for i, _ in ages[16:])
+                ages = ages[:16]
+                add_population(year, g, POP_OPEN_AGE[0], POP_OPEN_AGE[1], "80+ years", open_total)
+            for i, (code, label) in ages:
+                value = _population(i, g, year)
+                if single_year_ages and "-" in label:
+                    for k, (single_label, single_value) in enumerate(_single_year_ages(label, value)):
+                        add_population(year, g, f"{code}{k}", single_label, single_label.replace("세", " years"), single_value)
+                else:
+                    add_population(year, g, code, label, label.replace(" ", "").replace("세", " years"), value)
+
+    cancer, region_cancer = [], []
+    sites = _cancer_sites(multiple)
+    for year in range(start_year, last_observed_year + 1):
+        for g, (_, g_code, g_name, g_eng) in enumerate(GENDERS):
+            for i, (code, label) in enumerate(CANCER_AGES):
+                pop = _population(min(i, len(POP_AGES) - 1), g, year)
+                # 연령이 높을수록 지수적으로 증가하는 10만 명당 기준 발생률
+                age_rate = 600 * math.exp(0.09 * (i * 5 - 80))
+                total = 0
+                site_cases = []
+                for site_code, name, weight, growth, sex_weight in sites:
+                    rate = age_rate * weight * sex_weight[g] * (1 + growth) ** (year - 1999)
+                    cases = max(round(rate * pop / 100_000 * rng.uniform(0.9, 1.1)), 0)
+                    total += cases
+                    site_cases.append((site_code, name, cases))
+                    cancer.append(_record(
+                        cancer_template, PRD_DE=str(year), C1=site_code, C1_NM=name,
+                        C2=g_code, C2_NM=g_name, C2_NM_ENG=g_eng, C3=code, C3_NM=label, DT=str(cases)
+                    ))
+                # 모든암 = 개별 암종 합계 + 목록에 없는 기타 암종
+                all_cases = round(total * rng.uniform(1.15, 1.25))
+                site_cases.append(("15117AC0012000", ALL_CANCER, all_cases))
+                cancer.append(_record(
+                    cancer_template, PRD_DE=str(year), C1="15117AC0012000", C1_NM=ALL_CANCER,
+                    C2=g_code, C2_NM=g_name, C2_NM_ENG=g_eng, C3=code, C3_NM=label, DT=str(all_cases)
+                ))
+                # 시도별 테이블: C1=시도, C2=암종, C3=성별, C4=연령 (시도별 발생은 인구 비중 ± 20%)
+                for region, share in region_list:
+                    for site_code, name, cases in site_cases:
+                        region_cancer.append(_record(
+                            cancer_template, PRD_DE=str(year), C1=region, C1_NM=region, C2=site_code, C2_NM=name,
+                            C3=g_code, C3_NM=g_name, C4=code, C4_NM=label,
+                            DT=str(round(cases * share / share_total * region_rng.uniform(0.8, 1.2)))
+                        ))
+
+    tables = {"population": population, "cancer": cancer}
+    if region_list:
+        tables.update({"region_population": region_population, "region_cancer": region_cancer})
+    return tables
+
+
+def write_fixture(path, **kwargs):
+    """generate() 결과를 fixture JSON으로 저장하고 레코드 수를 반환합니다."""
+    tables = generate(**kwargs)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tables, f, ensure_ascii=False)
+    return {name: len(rows) for name, rows in tables.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KOSIS 형식 합성 fixture 생성")
+    parser.add_argument("out", nargs="?", default="fixture.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--multiple", type=int, default=1, help="암종 수 배수")
+    parser.add_argument("--regions", type=int, default=0, help=f"시도별 테이블에 포함할 시도 수 (최대 {len(REGIONS)})")
+    parser.add_argument("--single-year-ages", action="store_true", help="인구를 1세별로 생성")
+    args = parser.parse_args()
+    counts = write_fixture(
+        args.out, seed=args.seed, multiple=args.multiple, regions=args.regions, single_year_ages=args.single_year_ages
+    )
+    print(args.out, counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import polars as pl
+
+from analytics import STANDARD_AGE_GROUPS
+
+# 검증 리포트 스키마: 테이블·검사 항목·연도·성별·연령대별 불일치 행 수와 대표 설명
+REPORT_SCHEMA = {
+    "table": pl.String,
+    "check": pl.String,
+    "year": pl.Int32,
+    "gender": pl.String,
+    "age_group": pl.String,
+    "rows": pl.UInt32,
+    "detail": pl.String,
+}
+
+# 합계 비교 허용 오차 (인구·발생자수 단위)
+TOTAL_TOLERANCE = 0.5
+# 연령대를 분할/통합한 연도의 값이 인접 연도 대비 이 비율 이상 달라지면 보고합니다.
+MAX_HARMONISED_CHANGE = 0.25
+
+CHECK_LABELS = {
+    "exact_duplicate": "완전 중복 행 (제거됨)",
+    "duplicate_conflict": "같은 키에 값이 다른 중복 행",
+    "total_mismatch": "정제 전후 합계 불일치",
+    "missing_age_band": "누락된 연령대",
+    "unexpected_age_band": "표준 외 연령대",
+    "harmonised_jump": "분할 연령대의 인접 연도 대비 급변",
+    "unmatched_population": "인구 행이 없는 암발생 행 (조인 누락)",
+    "age_total_mismatch": "계(전체)와 원천 합계(조인 전 발생자수·인구) 불일치",
+    "fetch_failed": "수집에 실패한 연도 구간 (캐시하지 않음)",
+}
+
+
+def _issues(frame, table, check, detail):
+    """검사 결과 행을 리포트 스키마로 맞춥니다. (gender/age_group이 없으면 빈 값)"""
+    return frame.select([
+        pl.lit(table).alias("table"),
+        pl.lit(check).alias("check"),
+        pl.col("year").cast(pl.Int32),
+        pl.col("gender") if "gender" in frame.columns else pl.lit(None, pl.String).alias("gender"),
+        pl.col("age_group") if "age_group" in frame.columns else pl.lit(None, pl.String).alias("age_group"),
+        detail.cast(pl.String).alias("detail"),
+    ])
+
+
+def _compact(frames):
+    """검사 결과를 (테이블, 검사, 연도, 성별, 연령대)별 행 수로 요약합니다."""
+    frames = [f for f in frames if not f.is_empty()]
+    if not frames:
+        return pl.DataFrame(schema=REPORT_SCHEMA)
+    return pl.concat(frames).group_by(["table", "check", "year", "gender", "age_group"]).agg([
+        pl.len().cast(pl.UInt32).alias("rows"),
+        pl.col("detail").first(),
+    ]).select(list(REPORT_SCHEMA)).sort(["table", "check", "year", "gender", "age_group"], nulls_last=True)
+
+
+def check_fetch(table, failed):
+    """수집에 실패한 연도 구간 [(시작 연도, 종료 연도, 사유)]을 연도별 리포트 행으로 만듭니다."""
+    frames = [
+        _issues(pl.DataFrame({"year": list(range(start, end + 1))}), table, "fetch_failed", pl.lit(reason))
+        for start, end, reason in failed
+    ]
+    return _compact(frames)
+
+
+def check_source(table, mapped, normalized, value_col, deduplicate=False):
+    """원천 테이블의 정제 단계를 검증합니다.
+
+    mapped는 컬럼 매핑만 거친 원자료, normalized는 중복 제거(deduplicate)·연령대 분할/합산 후의 결과입니다.
+    완전 중복 제거 외에는 (연도, 키)별 합계가 보존되어야 하고, 정제 후에는 키가 유일하며
+    모든 표준 연령대가 빠짐없이 있어야 합니다.
+    """
+    keys = [c for c in mapped.columns if c not in ("year", "age_group", value_col)]
+    row_keys = ["year"] + keys + ["age_group"]
+    frames = []
+
+    # 1. 완전 중복 (unique()가 제거하는 행. 원자료에서 서로 다른 행이 매핑 후 같아진 경우도 포함되므로 확인 필요)과
+    #    같은 키에 값이 다른 중복 (unique()로 제거되지 않아 이중 집계됨)
+    if deduplicate:
+        frames.append(_issues(
+            mapped.filter(mapped.is_duplicated()).unique(), table, "exact_duplicate",
+            pl.format("{} = {}", pl.lit(value_col), pl.col(value_col))
+        ))
+    frames.append(_issues(
+        mapped.unique().filter(pl.len().over(row_keys) > 1), table, "duplicate_conflict",
+        pl.format("{} = {}", pl.lit(value_col), pl.col(value_col))
+    ))
+
+    # 2. (연도, 키)별 합계 보존: 연령대 분할/통합은 합계를 바꾸지 않아야 합니다.
+    group_keys = ["year"] + keys
+    totals = (mapped.unique() if deduplicate else mapped).group_by(group_keys).agg(pl.col(value_col).sum().alias("raw")).join(
+        normalized.group_by(group_keys).agg(pl.col(value_col).sum().alias("normalized")),
+        on=group_keys, how="full", coalesce=True
+    ).filter(
+        ((pl.col("raw").fill_null(0) - pl.col("normalized").fill_null(0)).abs() > TOTAL_TOLERANCE)
+    )
+    frames.append(_issues(
+        totals.with_columns(pl.lit("계(전체)").alias("age_group")), table, "total_mismatch",
+        pl.format("원자료 {} / 정제 {}", pl.col("raw").round(1), pl.col("normalized").round(1))
+    ))
+
+    # 3. 연령대 구성: 모든 (연도, 키) 그룹에 표준 연령대가 빠짐없이, 표준 외 연령대 없이 있어야 합니다.
+    expected = normalized.select(group_keys).unique().join(
+        pl.DataFrame({"age_group": STANDARD_AGE_GROUPS}), how="cross"
+    )
+    frames.append(_issues(
+        expected.join(normalized, on=row_keys, how="anti"), table, "missing_age_band", pl.lit("")
+    ))
+    frames.append(_issues(
+        normalized.filter(~pl.col("age_group").is_in(STANDARD_AGE_GROUPS)), table, "unexpected_age_band",
+        pl.format("{} = {}", pl.lit(value_col), pl.col(value_col))
+    ))
+
+    # 4. 분할·통합으로 새로 만든 연령대 행(원자료에 없던 행)은 다음 연도 같은 연령대와 비교해 급변 여부를 봅니다.
+    following = normalized.with_columns((pl.col("year") - 1).alias("year")).rename({value_col: "following"})
+    jumps = normalized.join(mapped, on=row_keys, how="anti").join(following, on=row_keys, how="inner").filter(
+        (pl.col("following") > 0) &
+        ((pl.col(value_col) / pl.col("following") - 1).abs() > MAX_HARMONISED_CHANGE)
+    )
+    frames.append(_issues(
+        jumps, table, "harmonised_jump",
+        pl.format("{} → 다음 연도 {}", pl.col(value_col).round(1), pl.col("following").round(1))
+    ))
+    return _compact(frames)
+
+
+def check_incidence(table, df_pop, df_cancer, processed):
+    """인구·암발생 조인과 발생률 테이블의 합계를 검증합니다.
+
+    모든 암발생 행은 같은 (연도, [시도], 성별, 연령대)의 인구 행을 찾아야 하며(누락 시 발생률 계산에서 빠짐),
+    계(전체) 행은 조인과 무관한 원천 합계와 대조합니다: 발생자수는 조인 전 암발생 테이블의 합계,
+    인구는 인구 테이블의 표준 연령대 합계와 같아야 합니다. (조인에서 빠진 행·연령대가 여기서 드러남)
+    """
+    region_keys = ["region"] if "region" in df_cancer.columns else []
+    join_keys = ["year"] + region_keys + ["gender", "age_group"]
+    frames = [_issues(
+        df_cancer.join(df_pop, on=join_keys, how="anti"), table, "unmatched_population",
+        pl.format("{}: cases = {}", pl.col("cancer_type"), pl.col("cases"))
+    )]
+
+    total_keys = ["year"] + region_keys + ["gender", "cancer_type"]
+    source_cases = df_cancer.filter(pl.col("age_group") != "계(전체)").group_by(total_keys).agg(
+        pl.col("cases").sum().alias("source_cases")
+    )
+    source_population = df_pop.filter(pl.col("age_group").is_in(STANDARD_AGE_GROUPS)).group_by(
+        ["year"] + region_keys + ["gender"]
+    ).agg(pl.col("population").sum().alias("source_population"))
+    reconciled = source_cases.join(
+        processed.filter(pl.col("age_group") == "계(전체)"), on=total_keys, how="full", coalesce=True
+    ).join(source_population, on=["year"] + region_keys + ["gender"], how="left").filter(
+        ((pl.col("source_cases").fill_null(0) - pl.col("cases").fill_null(0)).abs() > TOTAL_TOLERANCE) |
+        ((pl.col("source_population").fill_null(0) - pl.col("population").fill_null(0)).abs() > TOTAL_TOLERANCE)
+    )
+    frames.append(_issues(
+        reconciled.with_columns(pl.lit("계(전체)").alias("age_group")), table, "age_total_mismatch",
+        pl.format(
+            "{}: 발생자수 원천 {} / 계 {}, 인구 원천 {} / 계 {}", pl.col("cancer_type"),
+            pl.col("source_cases").round(1), pl.col("cases").round(1),
+            pl.col("source_population").round(0), pl.col("population").round(0)
+        )
+    ))
+    return _compact(frames)
+
+
+def summarize(report):
+    """테이블·검사 항목별 불일치 행 수 요약 (표시용)."""
+    return report.group_by(["table", "check"]).agg(pl.col("rows").sum()).with_columns(
+        pl.col("check").replace_strict(CHECK_LABELS, default=pl.col("check")).alias("description")
+    ).sort(["table", "check"])